@@ -0,0 +1,111 @@
+"""
+Скорость кадра сцены из многих траекторий:
+каждая траектория своим LineItem или все в общем буфере BatchLineItem.
+
+Сцена облетается камерой, для каждого шага рисуется кадр
+(подписи осей, выбор детализации и отрисовка) и меряется среднее время.
+Программный рендер тратит почти всё время кадра на закраску линий,
+поэтому кадр меряется ещё и с GL_RASTERIZER_DISCARD: без закраски
+остаются передача вызовов рисования и обработка вершин,
+то есть то, что экономит общий буфер.
+Отдельно меряется время, за которое прячется и снова показывается
+половина графиков и меняется цвет каждого десятого.
+
+    python bench/batch.py [графиков] [точек в графике]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from flyplot.export import setupHeadless  # noqa: E402
+
+# Окружение для отрисовки без дисплея задаём до импорта PySide6 и OpenGL
+setupHeadless()
+
+import numpy as np  # noqa: E402
+from OpenGL import GL  # noqa: E402
+from PySide6 import QtWidgets  # noqa: E402
+from flyplot import Trajectory  # noqa: E402
+from flyplot.export import makeGraph  # noqa: E402
+
+WIDTH, HEIGHT = 800, 600
+AXIS = {ax: {"name": ax, "dim": "m"} for ax in "xyz"}
+
+
+def makeRuns(count: int, points: int):
+    """
+    Разброс траекторий, как в расчёте методом Монте-Карло
+    """
+    rng = np.random.default_rng(0)
+    t = np.linspace(0, 100, points)
+    runs = []
+    for i in range(count):
+        k = 1 + 0.1 * rng.standard_normal(3)
+        coords = np.c_[1000 * k[0] * np.sin(t / 30),
+                       300 * k[1] * t / 100,
+                       2000 * k[2] * np.sin(np.pi * t / 100)]
+        runs.append(Trajectory(f"run{i}", AXIS, t, coords, np.float32))
+    return runs
+
+
+def benchFrames(graph, steps: int = 12, isDiscard: bool = False) -> float:
+    if isDiscard:
+        GL.glEnable(GL.GL_RASTERIZER_DISCARD)
+    t = time.perf_counter()
+    for azimuth in np.linspace(0, 360, steps, endpoint=False):
+        graph.setCameraPosition(azimuth=azimuth, elevation=30)
+        graph.paintGridByDirection()
+        graph.paintGL(viewport=(0, 0, WIDTH, HEIGHT))
+        GL.glFinish()
+    t = (time.perf_counter() - t) / steps
+    GL.glDisable(GL.GL_RASTERIZER_DISCARD)
+    return t
+
+
+def benchToggle(graph, runs) -> float:
+    t = time.perf_counter()
+    for traj in runs[::2]:
+        graph.setChartVisible(traj, False)
+    for traj in runs[::10]:
+        graph.setChartColor(traj, (1, 0, 0, 1))
+    graph.paintGL(viewport=(0, 0, WIDTH, HEIGHT))
+    for traj in runs[::2]:
+        graph.setChartVisible(traj, True)
+    graph.paintGL(viewport=(0, 0, WIDTH, HEIGHT))
+    GL.glFinish()
+    return time.perf_counter() - t
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    points = int(sys.argv[2]) if len(sys.argv) > 2 else 3000
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication(sys.argv)  # noqa: F841
+    runs = makeRuns(count, points)
+
+    print(f"{count} графиков по {points} точек, мс:")
+    for name, threshold in (("LineItem на график", count + 1),
+                            ("общий BatchLineItem", 1)):
+        graph = makeGraph(WIDTH, HEIGHT)
+        graph.batchThreshold = threshold
+        t = time.perf_counter()
+        graph.showCharts(runs)
+        for item in graph.items:
+            item.initialize()
+        graph.paintGL(viewport=(0, 0, WIDTH, HEIGHT))
+        GL.glFinish()
+        load = time.perf_counter() - t
+        frame = benchFrames(graph)
+        discard = benchFrames(graph, isDiscard=True)
+        toggle = benchToggle(graph, runs)
+        print(f"  {name:<20} добавление {load * 1000:8.1f}"
+              f"  кадр {frame * 1000:8.1f}"
+              f"  без закраски {discard * 1000:8.1f}"
+              f"  спрятать/цвет/показать {toggle * 1000:8.1f}")
+        graph.Clean()
+        graph.deleteLater()
+
+
+if __name__ == "__main__":
+    main()
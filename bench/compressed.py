@@ -0,0 +1,62 @@
+"""
+Скорость загрузки сжатых файлов графиков:
+файл сжимается gzip, bz2 и xz и загружается через loadChart
+с распаковкой на лету.
+
+    python bench/compressed.py [файл графика]
+"""
+import os
+import sys
+import bz2
+import gzip
+import lzma
+import time
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import numpy as np  # noqa: E402
+from flyplot.data import loadChart  # noqa: E402
+
+DEFAULT_FILE = os.path.join(os.path.dirname(__file__), "..", "data", "lol.txt")
+
+FORMATS = (("txt", None),
+           ("gz", gzip.compress),
+           ("bz2", bz2.compress),
+           ("xz", lzma.compress))
+
+
+def bestTime(func, repeat: int = 5) -> float:
+    times = []
+    for _ in range(repeat):
+        t = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - t)
+    return min(times)
+
+
+def main():
+    data_file = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_FILE
+    with open(data_file, "rb") as f:
+        text = f.read()
+    reference = loadChart(data_file)
+    mb = 1024 * 1024
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for ext, compress in FORMATS:
+            path = os.path.join(tmp, "chart." + ext)
+            with open(path, "wb") as f:
+                f.write(compress(text) if compress else text)
+
+            chart = loadChart(path)
+            assert np.array_equal(chart["coords"], reference["coords"])
+
+            t = bestTime(lambda: loadChart(path))
+            size = os.path.getsize(path)
+            print(f"{ext:>4}: {size / mb:6.2f} МБ на диске, {t * 1000:7.1f} мс, "
+                  f"{len(text) / mb / t:6.1f} МБ/с текста, "
+                  f"{size / mb / t:6.1f} МБ/с с диска")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Сравнение обрезки изображения readCutQImage:
+старый вариант с pixelColor в циклах и новый на numpy.
+
+    QT_QPA_PLATFORM=offscreen python bench/crop.py
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from PySide6 import QtWidgets, QtGui  # noqa: E402
+from flyplot import cropQImage  # noqa: E402
+
+
+def cropPixelColor(img: QtGui.QImage, bg_color: QtGui.QColor):
+    """
+    Прежняя реализация readCutQImage
+    """
+    bottom = 0
+    left = 0
+    top = img.height()-1
+    right = img.width()-1
+
+    for y in range(img.height()):
+        isFind = False
+        bottom = y
+        for x in range(img.width()):
+            if img.pixelColor(x, y) != bg_color:
+                isFind = True
+                break
+        if isFind:
+            break
+
+    for y in range(img.height()-1, bottom-1, -1):
+        isFind = False
+        top = y
+        for x in range(img.width()):
+            if img.pixelColor(x, y) != bg_color:
+                isFind = True
+                break
+        if isFind:
+            break
+
+    for x in range(img.width()):
+        left = x
+        isFind = False
+        for y in range(bottom, top+1):
+            if img.pixelColor(x, y) != bg_color:
+                isFind = True
+                break
+        if isFind:
+            break
+
+    for x in range(img.width()-1, left-1, -1):
+        right = x
+        isFind = False
+        for y in range(bottom, top+1):
+            if img.pixelColor(x, y) != bg_color:
+                isFind = True
+                break
+        if isFind:
+            break
+
+    width = right - left + 1
+    height = top - bottom + 1
+    if width > 1 and height > 1:
+        return img.copy(left, bottom, width, height)
+    return None
+
+
+def makeImage(width: int, height: int, bg_color: QtGui.QColor) -> QtGui.QImage:
+    """
+    Изображение с линией посередине, как у графика на белом фоне
+    """
+    img = QtGui.QImage(width, height, QtGui.QImage.Format_RGB32)  # type: ignore
+    img.fill(bg_color)
+    with QtGui.QPainter(img) as painter:
+        painter.setPen(QtGui.QColor("blue"))
+        painter.drawLine(width // 5, height // 6, width * 4 // 5, height * 5 // 6)
+    return img
+
+
+def main():
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication(sys.argv)  # noqa: F841
+    bg_color = QtGui.QColor.fromRgbF(1, 1, 1, 1)
+    for width, height in ((1920, 1080), (3840, 2160)):
+        img = makeImage(width, height, bg_color)
+
+        t = time.perf_counter()
+        old = cropPixelColor(img, bg_color)
+        tOld = time.perf_counter() - t
+
+        t = time.perf_counter()
+        new = cropQImage(img, bg_color)
+        tNew = time.perf_counter() - t
+
+        assert old == new
+        print(f"{width}x{height}: pixelColor {tOld * 1000:.0f} мс, "
+              f"numpy {tNew * 1000:.1f} мс")
+
+
+if __name__ == "__main__":
+    main()
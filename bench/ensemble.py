@@ -0,0 +1,73 @@
+"""
+Скорость статистики набора траекторий:
+1000 траекторий по 30 000 точек переводятся на общую сетку времени,
+по ним считаются средняя траектория и перцентили 5% и 95%,
+а затем строится сетка треугольников трубки разброса.
+
+Для нескольких ограничений памяти maxBytes меряется время
+и прирост пиковой памяти процесса (tracemalloc) сверх самих траекторий.
+
+    python bench/ensemble.py [траекторий] [точек в траектории]
+"""
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import numpy as np  # noqa: E402
+from flyplot import Trajectory  # noqa: E402
+from flyplot.ensemble import ensembleStats, commonTimeGrid, tubeMesh  # noqa: E402
+
+AXIS = {ax: {"name": ax, "dim": "m"} for ax in "xyz"}
+
+
+def makeRuns(count: int, points: int):
+    """
+    Разброс траекторий, как в расчёте методом Монте-Карло:
+    у каждой свои масштабы по осям, длительность и неравномерный шаг времени
+    """
+    rng = np.random.default_rng(0)
+    runs = []
+    for i in range(count):
+        k = 1 + 0.05 * rng.standard_normal(4)
+        t = np.cumsum(rng.uniform(0.005, 0.015, points))
+        t *= 300 * k[3] / t[-1]
+        coords = np.c_[1000 * k[0] * np.sin(t / 30),
+                       1000 * k[1] * np.cos(t / 30),
+                       2000 * k[2] * (1 - t / t[-1])]
+        runs.append(Trajectory(f"run{i}", AXIS, t, coords, np.float32))
+    return runs
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    points = int(sys.argv[2]) if len(sys.argv) > 2 else 30_000
+    mb = 1024 * 1024
+
+    t = time.perf_counter()
+    runs = makeRuns(count, points)
+    print(f"{count} траекторий по {points} точек: {sum(r.nbytes for r in runs) / mb:.0f} МБ,"
+          f" созданы за {time.perf_counter() - t:.1f} с")
+    grid = commonTimeGrid(runs, points)
+
+    for maxBytes in (16 * mb, 64 * mb, 256 * mb):
+        tracemalloc.start()
+        t = time.perf_counter()
+        stats = ensembleStats(runs, grid, maxBytes=maxBytes)
+        elapsed = time.perf_counter() - t
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        rate = count * points / elapsed / 1e6
+        print(f"  maxBytes {maxBytes // mb:4d} МБ: {elapsed:6.2f} с,"
+              f" {rate:5.1f} млн точек/с, пик памяти {peak / mb:6.0f} МБ")
+
+    t = time.perf_counter()
+    vertexes, faces = tubeMesh(stats.low, stats.high)
+    print(f"  трубка: {len(vertexes)} вершин, {len(faces)} треугольников"
+          f" за {(time.perf_counter() - t) * 1000:.0f} мс")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Скорость добавления точек в линию:
+GLLinePlotItem.setData со всем массивом и LineItem.append только с новыми.
+
+Для каждого способа меряется полный кадр после добавления
+(передача данных и отрисовка) и отдельно только передача данных
+для LineItem: весь массив через setData или новые точки через append.
+Точки лежат за пределами кадра, чтобы время закраски линии
+не заслоняло время передачи данных.
+
+    python bench/lines.py
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from flyplot.export import setupHeadless  # noqa: E402
+
+# Окружение для отрисовки без дисплея задаём до импорта PySide6 и OpenGL
+setupHeadless()
+
+import numpy as np  # noqa: E402
+import pyqtgraph.opengl as gl  # noqa: E402
+from OpenGL import GL  # noqa: E402
+from PySide6 import QtWidgets  # noqa: E402
+from flyplot import LineItem  # noqa: E402
+from flyplot.export import EGLContext  # noqa: E402
+
+WIDTH, HEIGHT = 800, 600
+
+
+def makePoints(n: int) -> np.ndarray:
+    t = np.linspace(0, 100, n)
+    # Матрицы по умолчанию единичные, z > 1 отсекается
+    return np.c_[np.cos(t), np.sin(t), t + 2].astype(np.float32)
+
+
+def chunks(points: np.ndarray, chunk: int):
+    for start in range(0, len(points), chunk):
+        yield start, points[start:start + chunk]
+
+
+def benchPlotItem(points: np.ndarray, chunk: int) -> float:
+    item = gl.GLLinePlotItem(pos=points[:1], antialias=True)
+    item.initialize()
+    t = time.perf_counter()
+    for start, part in chunks(points, chunk):
+        item.setData(pos=points[:start + len(part)], antialias=True)
+        item.paint()
+        GL.glFinish()
+    return time.perf_counter() - t
+
+
+def benchLineItem(points: np.ndarray, chunk: int, isAppend: bool,
+                  isDraw: bool) -> float:
+    item = LineItem(antialias=True)
+    item.initialize()
+    t = time.perf_counter()
+    for start, part in chunks(points, chunk):
+        if isAppend:
+            item.append(part)
+        else:
+            item.setData(pos=points[:start + len(part)])
+        if isDraw:
+            item.paint()
+        else:
+            item.flush()
+        GL.glFinish()
+    return time.perf_counter() - t
+
+
+def main():
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication(sys.argv)  # noqa: F841
+    EGLContext(WIDTH, HEIGHT)
+    GL.glViewport(0, 0, WIDTH, HEIGHT)
+
+    def rate(total, seconds):
+        return f"{total / seconds / 1e6:.2f}"
+
+    for total, chunk in ((100_000, 1000), (1_000_000, 10_000)):
+        points = makePoints(total)
+        print(f"{total} точек по {chunk}, млн точек/с:")
+        print("  кадр:     GLLinePlotItem.setData",
+              rate(total, benchPlotItem(points, chunk)),
+              "LineItem.setData", rate(total, benchLineItem(points, chunk, False, True)),
+              "LineItem.append", rate(total, benchLineItem(points, chunk, True, True)))
+        print("  передача: LineItem.setData",
+              rate(total, benchLineItem(points, chunk, False, False)),
+              "LineItem.append", rate(total, benchLineItem(points, chunk, True, False)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+"""
+Набор замеров скорости flyplot без дисплея.
+
+Графики: синтетические траектории из 10^3..10^7 точек и data/lol.txt.
+Для каждого графика меряются:
+    parseData          - разбор файла (Graph3DWidjet.__parseData без кэша)
+    addChart           - добавление графика целиком, без кэша
+    addChartCached     - добавление графика из заполненного кэша
+    recalcValuesAxis   - пересчёт подписей делений всех осей
+    orbit              - облёт камеры: setCameraPosition и paintGridByDirection
+                         с перестройкой подписей, время на один шаг
+    goDefView          - вид по умолчанию
+    readCutQImage      - кадр в EGL, считывание и обрезка фона,
+                         как readCutQImage у окна на экране
+
+Результаты пишутся в JSON. С --compare сравниваются с прошлым
+файлом результатов, замедление больше --threshold раз считается
+регрессией и код возврата будет 1.
+
+    python bench/suite.py -o results.json
+    python bench/suite.py --sizes 3,4,5 -o new.json --compare results.json
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import tempfile
+import subprocess
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from flyplot.export import setupHeadless  # noqa: E402
+
+# Окружение для отрисовки без дисплея задаём до импорта PySide6 и OpenGL
+setupHeadless()
+
+import numpy as np  # noqa: E402
+import PySide6  # noqa: E402
+from PySide6 import QtWidgets  # noqa: E402
+from flyplot.cache import ChartCache  # noqa: E402
+from flyplot.export import makeGraph, readFrame  # noqa: E402
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+LOL_FILE = os.path.join(ROOT, "data", "lol.txt")
+WIDTH, HEIGHT = 1280, 960
+
+HEADER = ("name: synthetic\n"
+          "type: 3D\n"
+          "x: North | m\n"
+          "y: East | m\n"
+          "z: Altitude | m\n"
+          "coords:\n")
+
+
+def makeTrajectory(path: str, n: int, chunk: int = 1_000_000):
+    """
+    Спираль с набором высоты в формате файлов расчёта, шаг времени 0.01 с
+    """
+    with open(path, "w") as f:
+        f.write(HEADER)
+        for start in range(0, n, chunk):
+            t = np.arange(start, min(start + chunk, n)) * 0.01
+            x = 1000 * np.cos(t / 50)
+            y = 1000 * np.sin(t / 50)
+            z = t
+            lines = [f"{a:.2f} -> {b:.3f} {c:.3f} {d:.3f}"
+                     for a, b, c, d in zip(t, x, y, z)]
+            f.write("\n".join(lines) + "\n")
+
+
+def measure(func, repeat: int, setup=None) -> dict:
+    """
+    Время func за repeat запусков, setup вызывается перед каждым
+    и в замер не входит
+    """
+    times = []
+    for _ in range(repeat):
+        arg = setup() if setup is not None else None
+        t = time.perf_counter()
+        func(arg)
+        times.append(time.perf_counter() - t)
+    return {"min": min(times), "median": float(np.median(times)), "repeat": repeat}
+
+
+def benchChart(name: str, path: str, repeat: int, orbitSteps: int,
+               cacheDir: str, log) -> dict:
+    results = {}
+
+    def run(bench, func, setup=None, count: int = repeat):
+        results[f"{bench}/{name}"] = r = measure(func, count, setup)
+        log(f"  {bench:<18} {r['min'] * 1000:10.2f} мс")
+
+    graph = makeGraph(WIDTH, HEIGHT)
+    graph.cache = None
+    run("parseData", lambda _: graph._Graph3DWidjet__parseData(path))
+
+    def cleanGraph(graph):
+        graph.Clean()
+        return graph
+
+    run("addChart", lambda g: g.addChart(path), lambda: cleanGraph(graph))
+
+    cache = ChartCache(cacheDir)
+    cache.load(path)
+    graph.cache = cache
+    run("addChartCached", lambda g: g.addChart(path), lambda: cleanGraph(graph))
+
+    def recalcValues(_):
+        for ax in "xyz":
+            graph.recalcValuesAxis(ax)
+        graph.flushAxis()
+    run("recalcValuesAxis", recalcValues)
+
+    def orbit(_):
+        for azimuth in np.linspace(0, 360, orbitSteps, endpoint=False):
+            graph.setCameraPosition(azimuth=azimuth, elevation=30)
+            graph.paintGridByDirection()
+            graph.flushAxis()
+    results[f"orbit/{name}"] = r = measure(orbit, repeat)
+    for key in ("min", "median"):
+        r[key] /= orbitSteps
+    log(f"  {'orbit':<18} {r['min'] * 1000:10.2f} мс на шаг")
+
+    run("goDefView", lambda _: graph.goDefView())
+    run("readCutQImage", lambda _: readFrame(graph, WIDTH, HEIGHT))
+
+    graph.Clean()
+    graph.deleteLater()
+    return results
+
+
+def gitCommit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], cwd=ROOT,
+                                       stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results: dict, base: dict, threshold: float, log) -> list:
+    """
+    Замеры, которые стали медленнее базовых больше чем в threshold раз
+    """
+    regressions = []
+    for key, r in results.items():
+        old = base.get("results", {}).get(key)
+        if old is None:
+            continue
+        ratio = r["min"] / old["min"] if old["min"] else 1.0
+        mark = ""
+        if ratio > threshold:
+            regressions.append(key)
+            mark = "  <-- регрессия"
+        log(f"{key:<40} {old['min'] * 1000:10.2f} -> {r['min'] * 1000:10.2f} мс"
+            f"  x{ratio:.2f}{mark}")
+    return regressions
+
+
+def parseSizes(text: str):
+    return [int(s) for s in text.split(",") if s]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python bench/suite.py",
+        description="Замеры скорости flyplot без дисплея")
+    parser.add_argument("-o", "--out", default="bench_results.json",
+                        help="файл JSON для результатов")
+    parser.add_argument("--sizes", type=parseSizes, default=[3, 4, 5, 6, 7],
+                        help="степени 10 числа точек синтетических графиков")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="сколько раз повторять каждый замер")
+    parser.add_argument("--orbit-steps", type=int, default=36,
+                        help="шагов облёта камеры")
+    parser.add_argument("--data-dir", default=None,
+                        help="папка для синтетических файлов, их можно не создавать заново")
+    parser.add_argument("--no-lol", action="store_true",
+                        help="не мерить data/lol.txt")
+    parser.add_argument("--compare", default=None,
+                        help="прошлый файл результатов для сравнения")
+    parser.add_argument("--threshold", type=float, default=1.2,
+                        help="во сколько раз медленнее считать регрессией")
+    args = parser.parse_args(argv)
+
+    def log(text):
+        print(text, flush=True)
+
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])  # noqa: F841
+
+    dataDir = args.data_dir or tempfile.mkdtemp(prefix="flyplot-bench-")
+    os.makedirs(dataDir, exist_ok=True)
+    charts = []
+    for power in args.sizes:
+        path = os.path.join(dataDir, f"synthetic_1e{power}.txt")
+        if not os.path.exists(path):
+            log(f"Создаём {path}")
+            makeTrajectory(path, 10 ** power)
+        charts.append((f"1e{power}", path))
+    if not args.no_lol:
+        charts.append(("lol", LOL_FILE))
+
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="flyplot-bench-cache-") as cacheDir:
+        for name, path in charts:
+            log(name)
+            results.update(benchChart(name, path, args.repeat, args.orbit_steps,
+                                      cacheDir, log))
+
+    report = {"meta": {"commit": gitCommit(),
+                       "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                       "python": platform.python_version(),
+                       "numpy": np.__version__,
+                       "pyside": PySide6.__version__,
+                       "platform": platform.platform(),
+                       "cpus": os.cpu_count(),
+                       "size": [WIDTH, HEIGHT]},
+              "results": results}
+    with open(args.out, "w") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    log(f"Результаты записаны в {args.out}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            base = json.load(f)
+        regressions = compare(results, base, args.threshold, log)
+        if regressions:
+            log(f"Регрессий: {len(regressions)}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,81 @@
+import os
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from .data import loadChart
+from .cache import ChartCache
+from .lod import prepareChart
+
+
+def _loadOne(data_file: str, cacheDir: str | None, maxSize: int, dtype=None):
+    """
+    Загрузка одного файла в дочернем процессе.
+    Если есть кэш, массивы пишутся в него, а в родительский процесс
+    возвращается только заголовок - там массивы откроются через mmap
+    без копирования через pipe.
+    С dtype график 3D сразу готовится к выводу через prepareChart
+    """
+    if cacheDir is None:
+        chart = loadChart(data_file)
+    else:
+        chart = ChartCache(cacheDir, maxSize).load(data_file)
+    if dtype is not None and chart["type"] == "3D":
+        return prepareChart(chart, dtype)
+    if cacheDir is not None:
+        chart.pop("times", None)
+        chart.pop("coords", None)
+    return chart
+
+
+def loadCharts(paths, workers: int | None = None,
+               cache: ChartCache | None = None, dtype=None):
+    """
+    Параллельная загрузка многих файлов графиков в пуле процессов.
+    Возвращает список графиков в порядке paths
+    и список ошибок (файл, текст ошибки).
+    С dtype графики 3D готовятся к выводу через prepareChart
+    там же, где разбираются: в словаре вместо массивов точек
+    будут траектория и пирамида детализации
+    """
+    paths = list(paths)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = max(1, min(workers, len(paths)))
+
+    charts = []
+    errors = []
+
+    if workers == 1:
+        # Один файл или один процесс - пул не нужен
+        for data_file in paths:
+            try:
+                if cache is not None:
+                    chart = cache.load(data_file)
+                else:
+                    chart = loadChart(data_file)
+                if dtype is not None and chart["type"] == "3D":
+                    chart = prepareChart(chart, dtype)
+                charts.append(chart)
+            except Exception as e:
+                errors.append((data_file, str(e)))
+        return charts, errors
+
+    cacheDir = cache.cacheDir if cache is not None else None
+    maxSize = cache.maxSize if cache is not None else 0
+    # fork из процесса с потоками Qt и OpenGL может зависнуть,
+    # дочерние процессы запускаются заново, как в flyplot.export
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=ctx) as pool:
+        futures = [pool.submit(_loadOne, data_file, cacheDir, maxSize, dtype)
+                   for data_file in paths]
+        for data_file, future in zip(paths, futures):
+            try:
+                chart = future.result()
+            except Exception as e:
+                errors.append((data_file, str(e)))
+                continue
+            if cache is not None and dtype is None and chart["type"] == "3D":
+                # Файл уже разобран дочерним процессом,
+                # здесь массивы только открываются из кэша
+                chart = cache.load(data_file)
+            charts.append(chart)
+    return charts, errors
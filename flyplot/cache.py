@@ -0,0 +1,198 @@
+import os
+import json
+import hashlib
+import tempfile
+import numpy as np
+from .data import loadChart
+from .timing import timed
+
+
+def defaultCacheDir() -> str:
+    """
+    Папка кэша по умолчанию.
+    Можно переопределить переменной окружения FLYPLOT_CACHE_DIR
+    """
+    path = os.environ.get("FLYPLOT_CACHE_DIR")
+    if path:
+        return path
+    base = os.environ.get("XDG_CACHE_HOME",
+                          os.path.join(os.path.expanduser("~"), ".cache"))
+    return os.path.join(base, "flyplot")
+
+
+class ChartCache:
+    """
+    Бинарный кэш разобранных файлов траекторий.
+    Для каждого файла хранится заголовок в json и пара .npy
+    с массивами times и coords, которые потом открываются через mmap.
+    Запись считается устаревшей, если у исходного файла
+    изменился размер или время модификации.
+    При превышении maxSize удаляются давно не использованные записи
+    """
+
+    def __init__(self, cacheDir: str | None = None,
+                 maxSize: int = 1024 * 1024 * 1024):
+        self.cacheDir = cacheDir or defaultCacheDir()
+        # Максимальный размер кэша в байтах
+        self.maxSize = maxSize
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self) -> dict:
+        """
+        Статистика попаданий в кэш
+        """
+        total = self.hits + self.misses
+        return {"hits": self.hits,
+                "misses": self.misses,
+                "ratio": self.hits / total if total else 0.0,
+                "size": self.size()}
+
+    def __paths(self, data_file: str):
+        # Имя записи - хэш абсолютного пути к исходному файлу
+        key = os.path.abspath(data_file).encode()
+        key = hashlib.sha1(key).hexdigest()
+        base = os.path.join(self.cacheDir, key)
+        return base + ".json", base + ".times.npy", base + ".coords.npy"
+
+    @timed("cacheLoad")
+    def load(self, data_file: str, progress=None) -> dict:
+        """
+        Загружаем график из кэша, а если его там нет,
+        разбираем исходный файл и сохраняем результат в кэш.
+        progress передаётся в loadChart
+        """
+        st = os.stat(data_file)
+        chart = self.__read(data_file, st)
+        if chart is not None:
+            self.hits += 1
+            return chart
+
+        self.misses += 1
+        chart = loadChart(data_file, progress)
+        if chart["type"] == "3D":
+            try:
+                self.__write(data_file, st, chart)
+                self.evict()
+            except OSError:
+                # Кэш - это только ускорение, без него тоже работаем
+                pass
+        return chart
+
+    def __read(self, data_file: str, st: os.stat_result):
+        headFile, timesFile, coordsFile = self.__paths(data_file)
+        try:
+            with open(headFile) as f:
+                head = json.load(f)
+            if head["size"] != st.st_size or head["mtime"] != st.st_mtime_ns:
+                return None
+            chart = head["chart"]
+            chart["times"] = np.load(timesFile, mmap_mode="r")
+            chart["coords"] = np.load(coordsFile, mmap_mode="r")
+            # Отмечаем запись как недавно использованную
+            os.utime(headFile)
+        except (OSError, ValueError, KeyError):
+            return None
+        return chart
+
+    def __write(self, data_file: str, st: os.stat_result, chart: dict):
+        os.makedirs(self.cacheDir, exist_ok=True)
+        headFile, timesFile, coordsFile = self.__paths(data_file)
+        axis = {}
+        for ax, d in chart["axis"].items():
+            axis[ax] = {"name": d["name"], "dim": d["dim"],
+                        "min": float(d["min"]), "max": float(d["max"])}
+        head = {"path": os.path.abspath(data_file),
+                "size": st.st_size,
+                "mtime": st.st_mtime_ns,
+                "chart": {"name": chart["name"],
+                          "type": chart["type"],
+                          "axis": axis}}
+        # Сначала пишем массивы, заголовок последним -
+        # без него запись не считается готовой
+        for fileName, arr in ((timesFile, chart["times"]),
+                              (coordsFile, chart["coords"])):
+            self.__replace(fileName, lambda f, arr=arr: np.save(f, arr))
+        self.__replace(headFile, lambda f: f.write(
+            json.dumps(head, ensure_ascii=False).encode()))
+
+    def __replace(self, fileName: str, write):
+        # Каждая запись идёт в свой временный файл: один и тот же исходный
+        # файл могут одновременно сохранять несколько потоков и процессов,
+        # а общий .tmp один из них подменил бы недописанным
+        fd, tmp = tempfile.mkstemp(dir=self.cacheDir,
+                                   prefix=os.path.basename(fileName) + ".",
+                                   suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                write(f)
+            os.replace(tmp, fileName)
+        except BaseException:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            raise
+
+    def __entries(self):
+        """
+        Записи кэша: (время последнего использования, размер, файлы)
+        """
+        entries = []
+        if not os.path.isdir(self.cacheDir):
+            return entries
+        for fileName in os.listdir(self.cacheDir):
+            if not fileName.endswith(".json"):
+                continue
+            base = os.path.join(self.cacheDir, fileName[:-len(".json")])
+            files = [base + ".json", base + ".times.npy", base + ".coords.npy"]
+            size = 0
+            used = 0.0
+            for path in files:
+                try:
+                    fst = os.stat(path)
+                except OSError:
+                    continue
+                size += fst.st_size
+                if path.endswith(".json"):
+                    used = fst.st_mtime
+            entries.append((used, size, files))
+        return entries
+
+    def size(self) -> int:
+        """
+        Текущий размер кэша в байтах
+        """
+        return sum(size for _, size, _ in self.__entries())
+
+    def evict(self):
+        """
+        Удаляем давно не использованные записи,
+        пока кэш не станет меньше maxSize
+        """
+        entries = sorted(self.__entries(), key=lambda e: e[0])
+        total = sum(size for _, size, _ in entries)
+        for _, size, files in entries:
+            if total <= self.maxSize:
+                break
+            for path in files:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            total -= size
+
+    def clear(self):
+        """
+        Полностью очищаем кэш
+        """
+        for _, _, files in self.__entries():
+            for path in files:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+
+# Общий кэш, которым по умолчанию пользуются виджеты графиков
+chartCache = ChartCache()
@@ -0,0 +1,398 @@
+import os
+import re
+import bz2
+import gzip
+import lzma
+from contextlib import contextmanager
+import numpy as np
+from .timing import timed
+
+
+# Строка, с которой начинается следующий блок файла (после координат)
+_POINTS_RE = re.compile(rb"\n[ \t]*points")
+# Строки-комментарии: первый непробельный символ - буква
+# (байты старше 0x7f - это буквы не из ASCII в utf-8)
+_COMMENT_RE = re.compile(rb"\n[ \t]*[A-Za-z\x80-\xff][^\n]*")
+
+
+def readHeader(f) -> dict:
+    """
+    Считываем заголовок файла траектории:
+    имя, тип графика, названия и размерности осей.
+    Файл открыт в бинарном режиме.
+    После вызова файл стоит на первой строке с координатами
+    """
+    def readline():
+        return f.readline().decode()
+
+    chart = {}
+    chart["name"] = readline().split("name: ")[-1].strip()
+    chart["type"] = readline().split("type: ")[-1].strip()
+    if chart["type"] != "3D":
+        return chart
+
+    chart["axis"] = {}
+    for _ in range(3):
+        # Получаем ось - x, y, z
+        ax, data = readline().split(":")
+        # Поолучаем её название и размерность
+        name, dim = map(lambda s: s.strip(), data.split("|"))
+        chart["axis"][ax] = {"name": name, "dim": dim}
+
+    # Считываем строку "coords:", там идентификатор начала точек графика
+    f.readline()
+    return chart
+
+
+def findPointsBlock(text: bytes) -> int:
+    """
+    Позиция начала блока points в тексте или -1, если его нет
+    """
+    m = _POINTS_RE.search(text)
+    if m:
+        return m.start()
+    return -1
+
+
+def _lineCounts(text: bytes, numbers: bytes):
+    """
+    Сколько стрелок "->" в каждой строке text и сколько чисел
+    в тех же строках numbers (text, где стрелки заменены пробелами).
+    text начинается с перевода строки
+    """
+    chars = np.frombuffer(text, dtype=np.uint8)
+    newlines = np.flatnonzero(chars == ord("\n"))
+    arrows = np.flatnonzero((chars[:-1] == ord("-")) & (chars[1:] == ord(">")))
+    # Число начинается там, где после пробельного символа идёт другой
+    space = np.frombuffer(numbers, dtype=np.uint8) <= ord(" ")
+    starts = np.flatnonzero(space[:-1] & ~space[1:])
+    # Отметки каждой строки лежат между её переводом строки и следующим
+    return (np.diff(np.searchsorted(arrows, newlines), append=len(arrows)),
+            np.diff(np.searchsorted(starts, newlines), append=len(starts)))
+
+
+def parseCoords(text: bytes):
+    """
+    Разбираем блок координат вида "t -> x y z" целиком средствами numpy.
+    Пустые строки и комментарии пропускаются,
+    разбор заканчивается на блоке "points".
+    Возвращает массивы times (N,) и coords (N, 3)
+    """
+    # Добавляем перевод строки, чтобы первая строка
+    # тоже находилась регулярными выражениями
+    text = b"\n" + text
+    # Отрезаем всё, что идёт после начала блока points
+    end = findPointsBlock(text)
+    if end >= 0:
+        text = text[:end]
+    # Убираем строки-комментарии
+    text = _COMMENT_RE.sub(b"", text)
+    # На пустой строке np.fromstring возвращает [-1.]
+    if text.isspace():
+        return np.empty(0), np.empty((0, 3))
+    # "->" меняем на два пробела, чтобы позиции в тексте не сдвинулись
+    numbers = text.replace(b"->", b"  ")
+    # По общему числу значений не видно строк вроде "1 -> 1 2" и "2 -> 3 4 5 6",
+    # поэтому проверяем каждую строку: одна стрелка и 4 числа
+    arrows, tokens = _lineCounts(text, numbers)
+    if not np.all((arrows == 1) & (tokens == 4) | (arrows == 0) & (tokens == 0)):
+        raise ValueError("Неверный формат строк с координатами")
+    # Теперь в тексте только числа, разбираем их одним проходом
+    values = np.fromstring(numbers, sep=" ")
+    # На неверном числе np.fromstring только предупреждает и обрывает разбор,
+    # поэтому сверяем число значений с числом строк "t -> x y z"
+    if values.size != 4 * text.count(b"->"):
+        raise ValueError("Неверный формат строк с координатами")
+    values = values.reshape(-1, 4)
+
+    times = values[:, 0].copy()
+    coords = np.ascontiguousarray(values[:, 1:])
+    return times, coords
+
+
+def calcBounds(coords: np.ndarray):
+    """
+    Крайние точки куба, вмещающего график
+    """
+    if not len(coords):
+        return np.zeros(3), np.zeros(3)
+    return coords.min(0), coords.max(0)
+
+
+# Начало сжатых файлов и чем их распаковывать
+_COMPRESSED = ((b"\x1f\x8b", lambda raw: gzip.GzipFile(fileobj=raw)),
+               (b"BZh", bz2.BZ2File),
+               (b"\xfd7zXZ\x00", lzma.LZMAFile),
+               # Старый формат .lzma
+               (b"\x5d\x00\x00", lzma.LZMAFile))
+
+
+def isCompressed(data_file: str) -> bool:
+    """
+    Сжат ли файл gzip, bz2 или xz/lzma, определяем по первым байтам
+    """
+    with open(data_file, "rb") as f:
+        magic = f.read(6)
+    return any(magic.startswith(prefix) for prefix, _ in _COMPRESSED)
+
+
+@contextmanager
+def openData(data_file: str):
+    """
+    Открываем файл графика на чтение в бинарном режиме.
+    Сжатые gzip, bz2 и xz/lzma файлы распаковываются на лету по частям,
+    целиком распакованный файл нигде не хранится.
+    Возвращает (файл для чтения, исходный файл на диске) -
+    по исходному файлу считается прогресс чтения
+    """
+    with open(data_file, "rb") as raw:
+        magic = raw.read(6)
+        raw.seek(0)
+        for prefix, decompressor in _COMPRESSED:
+            if magic.startswith(prefix):
+                with decompressor(raw) as f:
+                    yield f, raw
+                return
+        yield raw, raw
+
+
+class LoadCanceled(Exception):
+    """
+    Загрузка файла прервана пользователем
+    """
+
+
+class ChartTypeError(ValueError):
+    """
+    График в файле не 3D, траекторию из него не нарисовать
+    """
+
+    def __init__(self, chart: dict):
+        super().__init__(f'График типа "{chart["type"]}" а не 3D')
+        self.chart = chart
+
+
+def check3D(chart: dict) -> dict:
+    """
+    Проверяем, что график 3D, иначе бросаем ChartTypeError
+    """
+    if chart["type"] != "3D":
+        raise ChartTypeError(chart)
+    return chart
+
+
+# Размер блока, которыми файл читается с диска
+BLOCK_SIZE = 16 * 1024 * 1024
+
+
+@timed("readCoords")
+def readCoords(f, progress=None, blockSize: int = BLOCK_SIZE, raw=None):
+    """
+    Считываем блок координат из файла по частям.
+    После каждой части вызывается progress(прочитано байт, всего байт),
+    чтобы прервать загрузку, progress может бросить LoadCanceled.
+    raw - исходный файл на диске, если f распаковывает сжатый файл,
+    тогда прогресс считается по сжатым байтам
+    """
+    if raw is None:
+        raw = f
+    total = os.fstat(raw.fileno()).st_size
+
+    parts = []
+    tail = b""
+    while True:
+        block = f.read(blockSize)
+        # Распаковщик может вернуть меньше blockSize байт не в конце файла
+        isLast = not block
+        text = tail + block
+        # Разбираем только целые строки, остаток идёт в следующую часть
+        if not isLast:
+            cut = text.rfind(b"\n") + 1
+            text, tail = text[:cut], text[cut:]
+
+        end = findPointsBlock(b"\n" + text)
+        if end >= 0:
+            text = text[:end]
+            isLast = True
+        times, coords = parseCoords(text)
+        # Пустые части не добавляем, чтобы не склеивать массивы зря
+        if len(times) or not parts:
+            parts.append((times, coords))
+
+        if progress is not None:
+            progress(raw.tell() if not isLast else total, total)
+        if isLast:
+            break
+
+    if len(parts) == 1:
+        return parts[0]
+    times = np.concatenate([p[0] for p in parts])
+    coords = np.concatenate([p[1] for p in parts])
+    return times, coords
+
+
+@timed("loadChart")
+def loadChart(data_file: str, progress=None) -> dict:
+    """
+    Считываем файл траектории в словарь графика.
+    Для графиков не 3D типа точки не считываются
+    """
+    with openData(data_file) as (f, raw):
+        chart = readHeader(f)
+        if chart["type"] != "3D":
+            return chart
+        chart["times"], chart["coords"] = readCoords(f, progress, raw=raw)
+
+    # Крайние точки куба, вмещающего график
+    p1, p2 = calcBounds(chart["coords"])
+    for i, ax in enumerate("xyz"):
+        chart["axis"][ax]["min"] = p1[i]
+        chart["axis"][ax]["max"] = p2[i]
+
+    return chart
+
+
+class Trajectory:
+    """
+    Траектория одного графика: имя, оси и точки в непрерывных массивах.
+    dtype - точность хранения координат: float32 для вывода на экран
+    (вдвое меньше памяти), float64 для расчётов.
+    Времена всегда float64: в float32 у долгого полёта
+    соседние моменты сливаются в один.
+    Крайние точки куба, вмещающего траекторию, считаются заранее
+    """
+
+    __slots__ = ("name", "axis", "times", "coords", "min", "max")
+
+    def __init__(self, name: str, axis: dict, times=None, coords=None,
+                 dtype=np.float64):
+        self.name = name
+        # Названия и размерности осей: ось -> {"name", "dim"}
+        self.axis = {ax: {"name": d["name"], "dim": d["dim"]}
+                     for ax, d in axis.items()}
+        if times is None:
+            times, coords = np.empty(0), np.empty((0, 3))
+        self.setPoints(times, coords, dtype)
+
+    @classmethod
+    def fromChart(cls, chart: dict, dtype=np.float64) -> "Trajectory":
+        """
+        Траектория из словаря графика, который возвращает loadChart
+        """
+        return cls(chart["name"], chart["axis"],
+                   chart["times"], chart["coords"], dtype)
+
+    def setPoints(self, times, coords, dtype=None, bounds=None):
+        """
+        Задаём точки траектории.
+        Массивы нужного типа не копируются.
+        bounds - уже известные крайние точки (min, max), иначе считаются
+        """
+        if dtype is None:
+            dtype = self.coords.dtype
+        self.times = np.ascontiguousarray(times, dtype=np.float64)
+        self.coords = np.ascontiguousarray(coords, dtype=dtype).reshape(-1, 3)
+        if bounds is None:
+            bounds = calcBounds(self.coords)
+        self.min = np.asarray(bounds[0], dtype=np.float64)
+        self.max = np.asarray(bounds[1], dtype=np.float64)
+
+    def __len__(self):
+        return len(self.times)
+
+    @property
+    def dtype(self):
+        return self.coords.dtype
+
+    @property
+    def bounds(self):
+        return self.min, self.max
+
+    @property
+    def nbytes(self) -> int:
+        """
+        Сколько байт занимают точки траектории
+        """
+        return self.times.nbytes + self.coords.nbytes
+
+    def astype(self, dtype) -> "Trajectory":
+        """
+        Копия траектории с другой точностью координат
+        """
+        return Trajectory(self.name, self.axis, self.times, self.coords, dtype)
+
+    def label(self, ax: str) -> str:
+        """
+        Подпись оси: название и размерность
+        """
+        d = self.axis[ax]
+        return d["name"] + ", " + d["dim"]
+
+
+def loadTrajectory(data_file: str, dtype=np.float64, cache=None,
+                   progress=None) -> Trajectory:
+    """
+    Траектория из файла без графика и Qt.
+    cache - ChartCache, через который читать файл, None - разбирать файл.
+    Для графика не 3D бросается ChartTypeError
+    """
+    if cache is not None:
+        chart = cache.load(data_file, progress)
+    else:
+        chart = loadChart(data_file, progress)
+    return Trajectory.fromChart(check3D(chart), dtype)
+
+
+class CoordsBuffer:
+    """
+    Растущий буфер точек графика.
+    Память выделяется с запасом и удваивается при заполнении,
+    поэтому добавление точек в конец в среднем не копирует весь массив.
+    dtype - тип координат, времена, как у Trajectory, всегда float64
+    """
+
+    def __init__(self, capacity: int = 1024, dtype=np.float64):
+        self.size = 0
+        self.__times = np.empty(capacity, dtype=np.float64)
+        self.__coords = np.empty((capacity, 3), dtype=dtype)
+
+    @property
+    def capacity(self) -> int:
+        return len(self.__times)
+
+    @property
+    def times(self) -> np.ndarray:
+        return self.__times[:self.size]
+
+    @property
+    def coords(self) -> np.ndarray:
+        return self.__coords[:self.size]
+
+    def reserve(self, capacity: int):
+        """
+        Увеличиваем запас памяти минимум до capacity точек
+        """
+        if capacity <= self.capacity:
+            return
+        newCapacity = max(self.capacity, 1)
+        while newCapacity < capacity:
+            newCapacity *= 2
+        times = np.empty(newCapacity, dtype=self.__times.dtype)
+        coords = np.empty((newCapacity, 3), dtype=self.__coords.dtype)
+        times[:self.size] = self.times
+        coords[:self.size] = self.coords
+        self.__times = times
+        self.__coords = coords
+
+    def append(self, times: np.ndarray, coords: np.ndarray):
+        """
+        Добавляем точки в конец буфера
+        """
+        n = len(times)
+        self.reserve(self.size + n)
+        self.__times[self.size:self.size + n] = times
+        self.__coords[self.size:self.size + n] = coords
+        self.size += n
+
+    def clear(self):
+        self.size = 0
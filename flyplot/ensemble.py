@@ -0,0 +1,236 @@
+"""
+Статистика набора траекторий одного сценария (расчёт методом Монте-Карло).
+
+Все траектории переводятся на общую сетку времени линейной интерполяцией,
+а по ним в каждый момент считаются средняя точка и перцентили
+по каждой оси (по умолчанию 5% и 95%), которые задают «трубку» разброса.
+Сетка обрабатывается частями, чтобы на одну часть приходилось
+не больше maxBytes памяти, сколько бы ни было траекторий.
+Траектории из ChartCache открыты через mmap и в память целиком не читаются:
+точки берутся прямо из массивов словарей графиков,
+а к типу результата приводится только часть сетки
+"""
+import numpy as np
+from .data import Trajectory
+from .batch import loadCharts
+
+# Сколько памяти можно занять под точки всех траекторий одной части сетки
+MAX_BYTES = 64 * 1024 * 1024
+
+
+class EnsembleStats:
+    """
+    Средняя траектория и перцентили набора траекторий на общей сетке времени:
+    times (G,), mean, low и high (G, 3), q - перцентили low и high,
+    count - сколько траекторий в наборе
+    """
+
+    __slots__ = ("name", "axis", "times", "mean", "low", "high", "q", "count")
+
+    def __init__(self, name: str, axis: dict, times, mean, low, high,
+                 q=(5, 95), count: int = 0):
+        self.name = name
+        self.axis = axis
+        self.times = times
+        self.mean = mean
+        self.low = low
+        self.high = high
+        self.q = tuple(q)
+        self.count = count
+
+    def __len__(self):
+        return len(self.times)
+
+    @property
+    def bounds(self):
+        """
+        Крайние точки куба, вмещающего всю трубку разброса
+        """
+        if not len(self.times):
+            return np.zeros(3), np.zeros(3)
+        return (self.low.min(0).astype(np.float64),
+                self.high.max(0).astype(np.float64))
+
+    def meanTrajectory(self, dtype=np.float32) -> Trajectory:
+        """
+        Средняя траектория, крайние точки у неё - как у всей трубки,
+        чтобы сетка графика вмещала разброс
+        """
+        traj = Trajectory(self.name, self.axis, self.times, self.mean, dtype)
+        traj.setPoints(traj.times, traj.coords, bounds=self.bounds)
+        return traj
+
+
+def _points(run):
+    """
+    Времена и точки траектории или словаря графика от loadChart без копирования
+    """
+    if isinstance(run, Trajectory):
+        return run.times, run.coords
+    return run["times"], run["coords"]
+
+
+def commonTimeGrid(runs, count: int | None = None) -> np.ndarray:
+    """
+    Общая сетка времени: от самого позднего начала до самого раннего
+    конца траекторий (Trajectory или словарей графиков от loadChart),
+    count точек, по умолчанию - как у самой длинной
+    """
+    times = [_points(run)[0] for run in runs]
+    times = [t for t in times if len(t)]
+    if not times:
+        raise ValueError("Нет траекторий")
+    t0 = max(float(t[0]) for t in times)
+    t1 = min(float(t[-1]) for t in times)
+    if t1 < t0:
+        raise ValueError("У траекторий нет общего отрезка времени")
+    if count is None:
+        count = max(len(t) for t in times)
+    return np.linspace(t0, t1, max(count, 2))
+
+
+def resample(times: np.ndarray, coords: np.ndarray, grid: np.ndarray,
+             out: np.ndarray | None = None) -> np.ndarray:
+    """
+    Линейная интерполяция точек (N, 3) со временами times на сетку grid.
+    Индексы и веса считаются один раз для всех трёх осей.
+    За пределами times берутся крайние точки.
+    Из coords читаются только нужные точки, к типу out приводятся они же
+    """
+    n = len(times)
+    if out is None:
+        out = np.empty((len(grid), 3), dtype=coords.dtype)
+    if n == 1:
+        out[:] = coords[0]
+        return out
+    # Сетку приводим к типу times, иначе searchsorted копирует весь times
+    i = np.searchsorted(times, grid.astype(times.dtype, copy=False), "right")
+    i -= 1
+    # np.clip заметно медленнее на маленьких массивах
+    np.minimum(i, n - 2, out=i)
+    np.maximum(i, 0, out=i)
+    t0 = times[i]
+    dt = times[i + 1] - t0
+    # Одинаковые времена соседних точек: берём левую точку
+    w = np.divide(grid - t0, dt, out=np.zeros(len(grid)), where=dt > 0)
+    np.minimum(w, 1, out=w)
+    np.maximum(w, 0, out=w)
+    c0 = coords[i]
+    np.subtract(coords[i + 1], c0, out=out)
+    out *= w[:, None]
+    out += c0
+    return out
+
+
+def ensembleStats(runs, grid: np.ndarray | None = None, q=(5, 95),
+                  maxBytes: int = MAX_BYTES, dtype=np.float32,
+                  progress=None) -> EnsembleStats:
+    """
+    Средняя траектория и перцентили q набора траекторий runs
+    (Trajectory или словари графиков от loadChart) на сетке grid,
+    по умолчанию - commonTimeGrid.
+    Траектории без точек пропускаются, как и в commonTimeGrid.
+    После каждой части сетки вызывается progress(готово точек, всего точек)
+    """
+    runs = list(runs)
+    runPoints = [p for p in map(_points, runs) if len(p[0])]
+    if not runPoints:
+        raise ValueError("Нет траекторий с точками")
+    if grid is None:
+        grid = commonTimeGrid(runs)
+    grid = np.asarray(grid, dtype=np.float64)
+    size = len(grid)
+    count = len(runPoints)
+
+    mean = np.empty((size, 3), dtype=dtype)
+    low = np.empty((size, 3), dtype=dtype)
+    high = np.empty((size, 3), dtype=dtype)
+    # Часть сетки, точки всех траекторий для которой помещаются в maxBytes
+    itemSize = np.dtype(dtype).itemsize
+    chunk = max(1, maxBytes // (count * 3 * itemSize))
+    block = np.empty((count, min(chunk, size), 3), dtype=dtype)
+
+    for start in range(0, size, chunk):
+        end = min(start + chunk, size)
+        part = grid[start:end]
+        points = block[:, :end - start]
+        for k, (times, coords) in enumerate(runPoints):
+            resample(times, coords, part, out=points[k])
+        mean[start:end] = points.mean(0)
+        # Точки части больше не нужны, перцентили считаются прямо в них
+        low[start:end], high[start:end] = np.percentile(points, q, axis=0,
+                                                        overwrite_input=True)
+        if progress is not None:
+            progress(end, size)
+
+    first = runs[0]
+    if isinstance(first, Trajectory):
+        name, axis = first.name, first.axis
+    else:
+        name, axis = first["name"], first["axis"]
+    return EnsembleStats(name, axis, grid, mean, low, high, q, count)
+
+
+def loadEnsemble(paths, grid: np.ndarray | None = None, q=(5, 95),
+                 workers: int | None = None, cache=None,
+                 maxBytes: int = MAX_BYTES) -> EnsembleStats:
+    """
+    Статистика набора файлов траекторий.
+    Файлы разбираются параллельно через loadCharts,
+    файлы не 3D и файлы с ошибками бросают ValueError
+    """
+    # paths проходится дважды, генератор так не пройти
+    paths = list(paths)
+    charts, errors = loadCharts(paths, workers, cache)
+    if errors:
+        raise ValueError("Не удалось загрузить:\n" +
+                         "\n".join(f"{f}: {e}" for f, e in errors))
+    bad = [f for f, c in zip(paths, charts) if c["type"] != "3D"]
+    if bad:
+        raise ValueError("Графики не 3D:\n" + "\n".join(bad))
+    return ensembleStats(charts, grid, q, maxBytes)
+
+
+def tubeMesh(low: np.ndarray, high: np.ndarray, sides: int = 12):
+    """
+    Трубка разброса одной сеткой треугольников.
+    В каждой точке сетки времени строится кольцо из sides вершин
+    в плоскости, перпендикулярной оси трубки, растянутое по осям
+    до половины размаха перцентилей, так что кольцо лежит
+    внутри коробки от low до high.
+    Возвращает вершины (G * sides, 3) и треугольники (2 * (G - 1) * sides, 3)
+    """
+    low = np.asarray(low, dtype=np.float64)
+    high = np.asarray(high, dtype=np.float64)
+    center = (low + high) / 2
+    half = (high - low) / 2
+    size = len(center)
+    if size < 2:
+        return np.zeros((0, 3), dtype=np.float32), np.zeros((0, 3), dtype=np.uint32)
+
+    # Касательная к оси трубки и два перпендикуляра к ней
+    tangent = np.gradient(center, axis=0)
+    norm = np.linalg.norm(tangent, axis=1, keepdims=True)
+    tangent = np.divide(tangent, norm, out=np.tile([0.0, 0.0, 1.0], (size, 1)),
+                        where=norm > 0)
+    # Опорный вектор - ось, наименее сонаправленная с касательной
+    ref = np.zeros((size, 3))
+    ref[np.arange(size), np.abs(tangent).argmin(1)] = 1
+    u = np.cross(tangent, ref)
+    u /= np.linalg.norm(u, axis=1, keepdims=True)
+    v = np.cross(tangent, u)
+
+    angles = np.linspace(0, 2 * np.pi, sides, endpoint=False)
+    ring = (np.cos(angles)[None, :, None] * u[:, None, :]
+            + np.sin(angles)[None, :, None] * v[:, None, :])
+    vertexes = center[:, None, :] + ring * half[:, None, :]
+
+    # Два треугольника на каждую сторону между соседними кольцами
+    i = np.arange(size - 1)[:, None] * sides
+    j = np.arange(sides)[None, :]
+    a = i + j
+    b = i + (j + 1) % sides
+    faces = np.stack([np.stack([a, b, a + sides], -1),
+                      np.stack([b, b + sides, a + sides], -1)], 2)
+    return (vertexes.reshape(-1, 3).astype(np.float32),
+            faces.reshape(-1, 3).astype(np.uint32))
@@ -0,0 +1,297 @@
+"""
+Экспорт графиков в PNG без окна.
+
+Графики рисуются виджетом Graph3DWidjet на платформе Qt offscreen,
+а OpenGL берётся из программного рендера Mesa через EGL без дисплея.
+Каждый файл рисуется в отдельном процессе пула.
+
+    python -m flyplot.export data/ -o out/ --size 1600x1200 --workers 8
+"""
+import os
+import sys
+import glob
+import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+
+# Переменные окружения для отрисовки без дисплея,
+# их нужно задать до импорта PySide6 и OpenGL
+HEADLESS_ENV = {"QT_QPA_PLATFORM": "offscreen",
+                "PYOPENGL_PLATFORM": "egl",
+                "EGL_PLATFORM": "surfaceless"}
+
+
+def setupHeadless():
+    """
+    Задаём окружение для отрисовки без дисплея.
+    Уже заданные пользователем значения не меняются
+    """
+    for key, value in HEADLESS_ENV.items():
+        os.environ.setdefault(key, value)
+
+
+class EGLContext:
+    """
+    Контекст OpenGL в памяти (pbuffer) без окна и дисплея
+    """
+
+    def __init__(self, width: int, height: int):
+        import ctypes
+        from OpenGL import EGL
+
+        self.width = width
+        self.height = height
+
+        self.display = EGL.eglGetDisplay(EGL.EGL_DEFAULT_DISPLAY)
+        major, minor = EGL.EGLint(), EGL.EGLint()
+        if not EGL.eglInitialize(self.display, ctypes.pointer(major), ctypes.pointer(minor)):
+            raise RuntimeError("Не удалось инициализировать EGL")
+
+        attribs = (EGL.EGLint * 13)(
+            EGL.EGL_SURFACE_TYPE, EGL.EGL_PBUFFER_BIT,
+            EGL.EGL_RED_SIZE, 8,
+            EGL.EGL_GREEN_SIZE, 8,
+            EGL.EGL_BLUE_SIZE, 8,
+            EGL.EGL_DEPTH_SIZE, 24,
+            EGL.EGL_RENDERABLE_TYPE, EGL.EGL_OPENGL_BIT,
+            EGL.EGL_NONE)
+        config = EGL.EGLConfig()
+        count = EGL.EGLint()
+        EGL.eglChooseConfig(self.display, attribs, ctypes.pointer(config),
+                            1, ctypes.pointer(count))
+        if count.value < 1:
+            raise RuntimeError("Нет подходящей конфигурации EGL")
+
+        size = (EGL.EGLint * 5)(EGL.EGL_WIDTH, width,
+                                EGL.EGL_HEIGHT, height,
+                                EGL.EGL_NONE)
+        self.surface = EGL.eglCreatePbufferSurface(self.display, config, size)
+        EGL.eglBindAPI(EGL.EGL_OPENGL_API)
+        self.context = EGL.eglCreateContext(self.display, config,
+                                            EGL.EGL_NO_CONTEXT, None)
+        if not self.context:
+            raise RuntimeError("Не удалось создать контекст OpenGL")
+        self.makeCurrent()
+
+    def makeCurrent(self):
+        from OpenGL import EGL
+        EGL.eglMakeCurrent(self.display, self.surface, self.surface, self.context)
+
+
+# Сколько файлов рисует один процесс пула до перезапуска
+TASKS_PER_WORKER = 32
+
+# Контексты и приложение Qt создаются один раз на процесс
+_contexts = {}
+_app = None
+
+
+def _getContext(width: int, height: int) -> EGLContext:
+    ctx = _contexts.get((width, height))
+    if ctx is None:
+        ctx = _contexts[(width, height)] = EGLContext(width, height)
+    ctx.makeCurrent()
+    return ctx
+
+
+def renderCharts(paths, size=(1600, 1200), camera: dict | None = None):
+    """
+    Рисуем графики из файлов paths и возвращаем обрезанный QImage.
+    camera - аргументы setCameraPosition, иначе вид по умолчанию.
+    Окружение из setupHeadless должно быть задано до импорта flyplot
+    """
+    global _app
+    import shiboken6
+    from PySide6 import QtWidgets
+    from .batch import loadCharts
+    from .data import check3D, ChartTypeError
+
+    if _app is None:
+        _app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+
+    width, height = size
+    graph = makeGraph(width, height)
+
+    charts, errors = loadCharts(paths, 1, graph.cache)
+    if errors:
+        raise RuntimeError("\n".join(f"{f}: {e}" for f, e in errors))
+    for data_file, chart in zip(paths, charts):
+        try:
+            check3D(chart)
+        except ChartTypeError as e:
+            raise RuntimeError(f"{data_file}: {e}")
+    graph.showCharts(charts)
+
+    if camera:
+        graph.setCameraPosition(**camera)
+        graph.paintGridByDirection()
+
+    img = readFrame(graph, width, height)
+    # Цикла событий в процессе пула нет, deleteLater не сработал бы никогда,
+    # поэтому виджет удаляется сразу
+    graph.Clean()
+    shiboken6.delete(graph)
+    return img
+
+
+def makeGraph(width: int, height: int):
+    """
+    Виджет графика с кадром width x height для рисования без окна.
+    Контекст EGL такого размера делается текущим
+    """
+    from PySide6 import QtCore
+    from .gui import Graph3DWidjet
+
+    _getContext(width, height)
+    graph = Graph3DWidjet()
+    graph.setMinimumSize(QtCore.QSize(width, height))
+    graph.setMaximumSize(QtCore.QSize(width, height))
+    graph.resize(width, height)
+    graph.opts["viewport"] = (0, 0, width, height)
+    return graph
+
+
+def readFrame(graph, width: int, height: int):
+    """
+    Рисуем кадр графика в текущий контекст EGL и считываем его,
+    обрезая фон, как readCutQImage у окна на экране
+    """
+    import numpy as np
+    from OpenGL import GL
+    from PySide6 import QtGui
+    from .gui import cropQImage
+
+    for item in graph.items:
+        if not item.isInitialized():
+            item.initialize()
+    graph.paintGL(viewport=(0, 0, width, height))
+    GL.glFinish()
+
+    pixels = GL.glReadPixels(0, 0, width, height, GL.GL_RGBA, GL.GL_UNSIGNED_BYTE)
+    pixels = np.frombuffer(pixels, dtype=np.uint8).reshape(height, width, 4)
+    # В OpenGL первая строка - нижняя
+    pixels = np.ascontiguousarray(pixels[::-1])
+    img = QtGui.QImage(pixels.data, width, height,
+                       QtGui.QImage.Format_RGBA8888).copy()  # type: ignore
+
+    bg_color = QtGui.QColor.fromRgbF(*graph.opts['bgcolor'])
+    return cropQImage(img, bg_color)
+
+
+def _exportOne(paths, outFile: str, size, camera):
+    img = renderCharts(paths, size, camera)
+    if img is None:
+        raise RuntimeError("На графике ничего нет")
+    if not img.save(outFile):
+        raise RuntimeError(f"Не удалось сохранить {outFile}")
+    return outFile
+
+
+def findDataFiles(inputs, pattern: str = "*.txt*"):
+    """
+    Файлы графиков: файлы из inputs как есть, а из папок - по шаблону.
+    Шаблон по умолчанию берёт и сжатые файлы: .txt.gz, .txt.bz2, .txt.xz
+    """
+    files = []
+    for path in inputs:
+        if os.path.isdir(path):
+            files.extend(sorted(glob.glob(os.path.join(path, pattern))))
+        else:
+            files.append(path)
+    return files
+
+
+def exportCharts(inputs, outDir: str, size=(1600, 1200),
+                 camera: dict | None = None, workers: int | None = None,
+                 together: str | None = None, pattern: str = "*.txt*"):
+    """
+    Сохраняем графики в PNG без окна.
+    Каждый файл из inputs (или из папок в inputs) рисуется в outDir
+    в картинку с тем же именем, а с together все файлы рисуются
+    на одной картинке outDir/together.
+    Возвращает список (файл картинки, текст ошибки или None)
+    """
+    files = findDataFiles(inputs, pattern)
+    os.makedirs(outDir, exist_ok=True)
+
+    if together:
+        jobs = [(files, os.path.join(outDir, together))]
+    else:
+        jobs = []
+        for data_file in files:
+            name = os.path.splitext(os.path.basename(data_file))[0] + ".png"
+            jobs.append(([data_file], os.path.join(outDir, name)))
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = max(1, min(workers, len(jobs)))
+
+    # Дочерние процессы запускаются заново и наследуют окружение,
+    # поэтому OpenGL в них сразу загружается для EGL
+    setupHeadless()
+    results = []
+    ctx = multiprocessing.get_context("spawn")
+    # Процесс пула перезапускается после TASKS_PER_WORKER файлов:
+    # то, что Qt и драйвер OpenGL не отдают назад, не копится бесконечно
+    with ProcessPoolExecutor(max_workers=workers, mp_context=ctx,
+                             max_tasks_per_child=TASKS_PER_WORKER) as pool:
+        futures = [pool.submit(_exportOne, paths, outFile, tuple(size), camera)
+                   for paths, outFile in jobs]
+        for (_, outFile), future in zip(jobs, futures):
+            try:
+                future.result()
+                results.append((outFile, None))
+            except Exception as e:
+                results.append((outFile, str(e)))
+    return results
+
+
+def parseSize(text: str):
+    width, height = text.lower().split("x")
+    return int(width), int(height)
+
+
+def parseCamera(text: str) -> dict:
+    distance, elevation, azimuth = map(float, text.split(","))
+    return {"distance": distance, "elevation": elevation, "azimuth": azimuth}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m flyplot.export",
+        description="Сохранение графиков в PNG без окна")
+    parser.add_argument("inputs", nargs="+",
+                        help="файлы графиков или папки с ними")
+    parser.add_argument("-o", "--out", default=".",
+                        help="папка для картинок")
+    parser.add_argument("--size", type=parseSize, default=(1600, 1200),
+                        help="размер кадра, например 1600x1200")
+    parser.add_argument("--camera", type=parseCamera, default=None,
+                        help="положение камеры: расстояние,возвышение,азимут")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="количество процессов, по умолчанию по числу ядер")
+    parser.add_argument("--together", default=None,
+                        help="нарисовать все файлы на одной картинке с этим именем")
+    parser.add_argument("--pattern", default="*.txt*",
+                        help="шаблон файлов графиков в папках")
+    args = parser.parse_args(argv)
+
+    # Берём функции из модуля flyplot.export, а не из __main__,
+    # чтобы дочерние процессы нашли их по имени модуля
+    from flyplot.export import exportCharts as export
+    results = export(args.inputs, args.out, args.size, args.camera,
+                     args.workers, args.together, args.pattern)
+
+    failed = 0
+    for outFile, error in results:
+        if error:
+            failed += 1
+            print(f"{outFile}: {error}", file=sys.stderr)
+        else:
+            print(outFile)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,2554 @@
+import os
+import math
+import bisect
+import time
+import cProfile
+import tempfile
+from collections import deque
+from collections import OrderedDict
+import numpy as np
+import pyqtgraph as pg
+import pyqtgraph.opengl as gl
+from pyqtgraph.opengl.GLGraphicsItem import GLGraphicsItem
+from OpenGL import GL
+from PySide6.QtCore import Slot
+from PySide6 import QtWidgets, QtGui, QtCore
+from .data import loadChart, readHeader, parseCoords, findPointsBlock, CoordsBuffer
+from .data import LoadCanceled, Trajectory, isCompressed, ChartTypeError, check3D
+from .cache import ChartCache, chartCache
+from .batch import loadCharts
+from .lod import LodPyramid, prepareChart
+from .layout import valueTransforms, labelTransforms, gridBounds, tickTexts
+from .mapped import MappedTrajectory
+from .timing import timings, timed
+from .ensemble import EnsembleStats, tubeMesh
+
+
+# Общий кэш картинок текста:
+# (текст, шрифт, размер в пикселях, цвет) -> массив RGBA
+_textCache = OrderedDict()
+# Сколько картинок текста хранить в кэше
+TEXT_CACHE_SIZE = 2048
+
+
+def textKey(text: str, font: QtGui.QFont, color: QtGui.QColor):
+    """
+    Ключ, по которому одинаковые надписи рисуются один раз
+    """
+    return (text, font.family(), font.pixelSize(), color.rgba())
+
+
+def rasterizeText(text: str, font: QtGui.QFont, color: QtGui.QColor) -> np.ndarray:
+    """
+    Рисуем текст в массив (высота, ширина, 4).
+    Одинаковые надписи рисуются один раз и берутся из кэша,
+    массив из кэша доступен только для чтения
+    """
+    key = textKey(text, font, color)
+    data = _textCache.get(key)
+    if data is not None:
+        _textCache.move_to_end(key)
+        return data
+
+    # Размер текста считаем по метрикам шрифта, без рисования
+    text_rect = QtGui.QFontMetrics(font).boundingRect(
+        QtCore.QRect(0, 0, 0, 0), 0, text)
+    width = max(text_rect.width(), 1)
+    height = max(text_rect.height(), 1)
+
+    # Создаём изображение по размеру текста
+    img = QtGui.QImage(width, height,
+                       QtGui.QImage.Format_ARGB32)  # type: ignore
+    # Заполняем все одним цветом, чтобы не было помех
+    img.fill(0)
+    # Создаем объект QPainter для рисования в QImage
+    with QtGui.QPainter(img) as painter:
+        # Задаём программное сглаживание текста
+        painter.setRenderHint(
+            QtGui.QPainter.TextAntialiasing)  # type: ignore
+        # Устанавливаем цвет и прозрачность текста
+        painter.setPen(color)
+        # Шрифт текста
+        painter.setFont(font)
+        # Рисуем текст
+        painter.drawText(img.rect(), text)
+
+    # Переводим изображение в байты
+    buffer = img.constBits().tobytes()  # type: ignore
+    # Преобразуем баты в массив numpy
+    data = np.ndarray(shape=(img.height(), img.width(), 4),
+                      dtype=np.uint8, buffer=buffer)
+    data.flags.writeable = False
+
+    _textCache[key] = data
+    if len(_textCache) > TEXT_CACHE_SIZE:
+        _textCache.popitem(last=False)
+    return data
+
+
+class TextBase:
+    """
+    Общая часть надписей: текст, шрифт, цвет
+    и перемещения в системе координат надписи.
+    Класс-наследник даёт translate, rotate, resetTransform и setData
+    """
+
+    def _initText(self, text, fontFamily, size, color):
+        self.font = QtGui.QFont()
+        self.setText(text, fontFamily, size, color, isUpd=False)
+
+        self.width = self.size * len(self.text)
+        self.height = self.size*2
+
+        return self.__convertTextToData()
+
+    def resetTransform(self):
+        super().resetTransform()
+        self.translate(-self.height/2, -self.width/2, 0)
+        self.myRotate(-90, "z")
+
+    def myTranslate(self, dx, dy, dz):
+        dx, dy = -dy, dx
+        self.translate(dx, dy, dz, local=True)
+
+    def myRotate(self, angle, axi):
+        r = {"x": 0, "y": 0, "z": 0}
+        r[axi] = 1
+        r["x"], r["y"] = r["y"], r["x"]
+
+        self.myTranslate(self.width/2, -self.height/2, 0)
+        self.rotate(angle, r["x"], r["y"], r["z"], local=True)
+        self.myTranslate(-self.width/2, self.height/2, 0)
+
+    def setColor(self, color, isUpd=True):
+        # Переводим  в BGR, тут так это работает
+        color = pg.mkColor(color)
+        r = color.red()
+        g = color.green()
+        b = color.blue()
+        a = color.alpha()
+
+        self.color = pg.mkColor((b, g, r, a))
+
+        if isUpd:
+            data = self.__convertTextToData()
+            self.setData(data)
+
+    def setFont(self, fontFamily=None, size=None, color=None, isUpd=True):
+        if fontFamily:
+            self.font.setFamily(fontFamily)
+
+        if size:
+            self.size = size
+            self.font.setPixelSize(size)
+
+        if color:
+            self.setColor(color, isUpd=False)
+
+        if isUpd:
+            data = self.__convertTextToData()
+            self.setData(data)
+
+    def setText(self, text, fontFamily=None, size=None, color=None, isUpd=True):
+        self.text = str(text)
+        self.setFont(fontFamily, size, color, isUpd=False)
+        if isUpd:
+            data = self.__convertTextToData()
+            self.setData(data)
+
+    def textKey(self):
+        return textKey(self.text, self.font, self.color)
+
+    @timed("rasterizeText")
+    def __convertTextToData(self):
+        data = rasterizeText(self.text, self.font, self.color)
+        self.height, self.width = data.shape[:2]
+        return data
+
+
+class Text3DItem(TextBase, gl.GLImageItem):
+    def __init__(self,
+                 text,
+                 fontFamily: str = "Arial",
+                 size: int = 100,
+                 color=(0, 0, 0, 255)):
+        data = self._initText(text, fontFamily, size, color)
+        super().__init__(data, smooth=True)
+
+        self.resetTransform()
+
+    def initializeGL(self):
+        # Текстура создаётся в _updateTexture: addItem инициализирует надпись
+        # раньше, чем она узнает свой график, а на графике
+        # с общими текстурами своя текстура не нужна
+        pass
+
+    def _updateTexture(self):
+        # Одинаковые надписи на одном графике используют одну текстуру
+        textures = getattr(self.view(), "textTextures", None)
+        if textures is None:
+            if self.texture is None:
+                self.texture = GL.glGenTextures(1)
+            super()._updateTexture()
+            return
+        key = self.textKey()
+        texture = textures.get(key)
+        if texture is None:
+            # Общую текстуру создаём отдельно, чтобы смена текста
+            # этой надписи не испортила её у других надписей
+            self.texture = GL.glGenTextures(1)
+            super()._updateTexture()
+            textures[key] = self.texture
+            if len(textures) > TEXT_CACHE_SIZE:
+                # Надписи со старой текстурой загрузят её заново в paint
+                GL.glDeleteTextures(1, [textures.popitem(last=False)[1]])
+        else:
+            textures.move_to_end(key)
+            self.texture = texture
+
+    def paint(self):
+        textures = getattr(self.view(), "textTextures", None)
+        if textures is not None and textures.get(self.textKey()) != self.texture:
+            # Общую текстуру надписи вытеснили из кэша
+            self._needUpdate = True
+        super().paint()
+
+
+class Transform3D:
+    """
+    Матрица положения объекта с теми же методами, что у GLGraphicsItem.
+    Матрицу можно задать массивом numpy через setMatrix,
+    тогда QMatrix4x4 из него строится, только когда она понадобится
+    """
+
+    def __init__(self):
+        self.__transform = QtGui.QMatrix4x4()
+        # Матрица (4, 4) по строкам, ещё не перенесённая в __transform
+        self.__matrix = None
+
+    def transform(self) -> QtGui.QMatrix4x4:
+        if self.__matrix is not None:
+            self.__transform = QtGui.QMatrix4x4(self.__matrix.ravel().tolist())
+            self.__matrix = None
+        return self.__transform
+
+    def matrix(self) -> np.ndarray:
+        """
+        Матрица положения (4, 4) по строкам
+        """
+        if self.__matrix is not None:
+            return self.__matrix
+        # QMatrix4x4.data() хранит матрицу по столбцам
+        return np.array(self.__transform.data(), dtype=np.float32).reshape(4, 4).T
+
+    def setMatrix(self, m: np.ndarray):
+        self.__matrix = m
+
+    def resetTransform(self):
+        self.__matrix = None
+        self.__transform.setToIdentity()
+
+    def applyTransform(self, tr: QtGui.QMatrix4x4, local: bool = False):
+        if local:
+            self.__transform = self.transform() * tr
+        else:
+            self.__transform = tr * self.transform()
+
+    def translate(self, dx, dy, dz, local=False):
+        tr = QtGui.QMatrix4x4()
+        tr.translate(dx, dy, dz)
+        self.applyTransform(tr, local=local)
+
+    def rotate(self, angle, x, y, z, local=False):
+        tr = QtGui.QMatrix4x4()
+        tr.rotate(angle, x, y, z)
+        self.applyTransform(tr, local=local)
+
+    def setTransform(self, tr: QtGui.QMatrix4x4):
+        self.__matrix = None
+        self.__transform = QtGui.QMatrix4x4(tr.copyDataTo())
+
+
+def _labelMatrix(label) -> np.ndarray:
+    """
+    Матрица положения надписи (4, 4) по строкам
+    """
+    if isinstance(label, Transform3D):
+        return label.matrix()
+    # QMatrix4x4.data() хранит матрицу по столбцам
+    return np.array(label.transform().data(), dtype=np.float32).reshape(4, 4).T
+
+
+class TextLabel(TextBase, Transform3D):
+    """
+    Надпись без собственного объекта на сцене.
+    Размещается так же, как Text3DItem, а рисуется через TextAtlasItem
+    """
+
+    def __init__(self,
+                 text,
+                 fontFamily: str = "Arial",
+                 size: int = 100,
+                 color=(0, 0, 0, 255)):
+        Transform3D.__init__(self)
+        data = self._initText(text, fontFamily, size, color)
+        self.setData(data)
+
+        self.resetTransform()
+
+    def setData(self, data):
+        self.data = data
+
+
+class TextAtlasItem(GLGraphicsItem):
+    """
+    Все надписи набора одной текстурой и одним вызовом отрисовки.
+    Картинки надписей упаковываются в атлас,
+    каждая надпись - четырёхугольник со своими текстурными координатами
+    """
+
+    # Максимальная ширина атласа в пикселях
+    ATLAS_WIDTH = 2048
+
+    def __init__(self, parentItem=None):
+        super().__init__(parentItem=parentItem)
+        self.setGLOptions("translucent")
+        self.labels = []
+        self.texture = None
+        # Атлас (строки, столбцы, 4) и положение надписей в нём
+        self._atlas = None
+        self._atlasKeys = None
+        self._rects = {}
+        self._needUpload = False
+        # Высоты и ширины надписей и их текстурные координаты
+        self._sizes = None
+        self._texCoords = None
+        # Вершины всех четырёхугольников
+        self.__vertexes = None
+
+    def setLabels(self, labels: list):
+        """
+        Задаём надписи атласа.
+        Атлас перестраивается, только если поменялся набор текстов
+        """
+        self.labels = list(labels)
+        keys = tuple(sorted(set(l.textKey() for l in self.labels)))
+        if keys != self._atlasKeys:
+            self._atlasKeys = keys
+            self._pack()
+        # Размеры и место надписей в атласе меняются только здесь,
+        # при движении надписей пересчитываются одни вершины
+        if self.labels:
+            self._sizes = self._labelSizes()
+            self._texCoords = self._calcTexCoords(*self._sizes)
+        self.updateLayout()
+
+    def _pack(self):
+        # Упаковываем картинки надписей полками слева направо
+        images = {}
+        for l in self.labels:
+            images[l.textKey()] = l.data
+
+        rects = {}
+        x = y = rowHeight = 0
+        width = 1
+        for key, data in images.items():
+            h, w = data.shape[:2]
+            if x and x + w > self.ATLAS_WIDTH:
+                x = 0
+                y += rowHeight + 1
+                rowHeight = 0
+            rects[key] = (y, x)
+            # Зазор в 1 пиксель, чтобы соседние надписи не смешивались
+            x += w + 1
+            width = max(width, x)
+            rowHeight = max(rowHeight, h)
+
+        atlas = np.zeros((max(y + rowHeight, 1), width, 4), dtype=np.uint8)
+        for key, data in images.items():
+            r, c = rects[key]
+            h, w = data.shape[:2]
+            atlas[r:r + h, c:c + w] = data
+
+        self._atlas = atlas
+        self._rects = rects
+        self._needUpload = True
+
+    def updateLayout(self, mats: np.ndarray | None = None):
+        """
+        Пересчитываем вершины всех надписей по их матрицам положения.
+        mats - уже посчитанные матрицы (N, 4, 4), иначе берутся у надписей
+        """
+        n = len(self.labels)
+        if not n:
+            self.__vertexes = None
+            self.update()
+            return
+
+        mats = self._labelMatrices(mats)
+        h, w = self._sizes
+
+        # Углы надписей в их системе координат, как у GLImageItem:
+        # строки картинки идут по x, столбцы по y
+        corners = np.zeros((n, 4, 4), dtype=np.float32)
+        corners[:, :, 3] = 1
+        corners[:, 1, 0] = h
+        corners[:, 2, 0] = h
+        corners[:, 2, 1] = w
+        corners[:, 3, 1] = w
+        vertexes = np.einsum("nij,nkj->nki", mats, corners)[:, :, :3]
+        self.__vertexes = np.ascontiguousarray(vertexes.reshape(-1, 3))
+        self.update()
+
+    def _labelMatrices(self, mats: np.ndarray | None = None) -> np.ndarray:
+        """
+        Матрицы положения надписей (N, 4, 4)
+        """
+        if mats is not None:
+            return np.asarray(mats, dtype=np.float32)
+        return np.array([_labelMatrix(l) for l in self.labels], dtype=np.float32)
+
+    def _labelSizes(self):
+        """
+        Высота и ширина картинок надписей в пикселях
+        """
+        size = np.array([l.data.shape[:2] for l in self.labels], dtype=np.float32)
+        return size[:, 0], size[:, 1]
+
+    def _calcTexCoords(self, h: np.ndarray, w: np.ndarray) -> np.ndarray:
+        """
+        Текстурные координаты углов надписей в атласе,
+        углы в том же порядке, что и в updateLayout
+        """
+        n = len(self.labels)
+        rows, cols = self._atlas.shape[:2]
+        origin = np.array([self._rects[l.textKey()] for l in self.labels],
+                          dtype=np.float32)
+        texCoords = np.empty((n, 4, 2), dtype=np.float32)
+        texCoords[:, :, 0] = origin[:, 1, None]
+        texCoords[:, :, 1] = origin[:, 0, None]
+        texCoords[:, 2:, 0] += w[:, None]
+        texCoords[:, 1:3, 1] += h[:, None]
+        texCoords[:, :, 0] /= cols
+        texCoords[:, :, 1] /= rows
+        return np.ascontiguousarray(texCoords.reshape(-1, 2))
+
+    def _uploadTexture(self):
+        if self.texture is None:
+            self.texture = GL.glGenTextures(1)
+        rows, cols = self._atlas.shape[:2]
+        GL.glBindTexture(GL.GL_TEXTURE_2D, self.texture)
+        GL.glTexParameteri(GL.GL_TEXTURE_2D, GL.GL_TEXTURE_MIN_FILTER, GL.GL_LINEAR)
+        GL.glTexParameteri(GL.GL_TEXTURE_2D, GL.GL_TEXTURE_MAG_FILTER, GL.GL_LINEAR)
+        GL.glTexParameteri(GL.GL_TEXTURE_2D, GL.GL_TEXTURE_WRAP_S, GL.GL_CLAMP_TO_EDGE)
+        GL.glTexParameteri(GL.GL_TEXTURE_2D, GL.GL_TEXTURE_WRAP_T, GL.GL_CLAMP_TO_EDGE)
+        GL.glTexImage2D(GL.GL_TEXTURE_2D, 0, GL.GL_RGBA, cols, rows, 0,
+                        GL.GL_RGBA, GL.GL_UNSIGNED_BYTE, self._atlas)
+
+    def release(self):
+        """
+        Удаляем текстуру атласа из видеокарты.
+        Вызывается, пока объект ещё на графике: нужен контекст OpenGL виджета
+        """
+        if self.texture is None:
+            return
+        view = self.view()
+        if view is not None and view.context() is not None:
+            view.makeCurrent()
+        GL.glDeleteTextures(1, [self.texture])
+        self.texture = None
+        self._needUpload = self._atlas is not None
+
+    def paint(self):
+        if self.__vertexes is None:
+            return
+        if self._needUpload:
+            self._uploadTexture()
+            self._needUpload = False
+
+        self.setupGLState()
+        GL.glEnable(GL.GL_TEXTURE_2D)
+        GL.glBindTexture(GL.GL_TEXTURE_2D, self.texture)
+        GL.glColor4f(1, 1, 1, 1)
+
+        GL.glEnableClientState(GL.GL_VERTEX_ARRAY)
+        GL.glEnableClientState(GL.GL_TEXTURE_COORD_ARRAY)
+        try:
+            GL.glVertexPointerf(self.__vertexes)
+            GL.glTexCoordPointerf(self._texCoords)
+            GL.glDrawArrays(GL.GL_QUADS, 0, len(self.__vertexes))
+        finally:
+            GL.glDisableClientState(GL.GL_TEXTURE_COORD_ARRAY)
+            GL.glDisableClientState(GL.GL_VERTEX_ARRAY)
+            GL.glBindTexture(GL.GL_TEXTURE_2D, 0)
+            GL.glDisable(GL.GL_TEXTURE_2D)
+
+
+class BillboardTextItem(TextAtlasItem):
+    """
+    Надписи из атласа, которые разворачивает вершинный шейдер.
+    Для каждой вершины передаются точка привязки, смещение угла
+    и режим ориентации, поэтому при вращении камеры
+    надписи не нужно поворачивать на процессоре.
+    Режимы:
+        CAMERA - надпись всегда лицом к камере, смещение в пикселях экрана,
+        PLANE - надпись лежит в своей плоскости, как у TextAtlasItem.
+    Подходит вместо Text3DItem и TextAtlasItem для подписей осей
+    """
+
+    CAMERA = 0
+    PLANE = 1
+
+    VERTEX_SHADER = """
+        #version 120
+        attribute vec3 anchor;
+        attribute vec2 offset;
+        attribute vec2 texCoord;
+        attribute float mode;
+        attribute vec3 axisU;
+        attribute vec3 axisV;
+        uniform vec2 viewport;
+        varying vec2 vTexCoord;
+        void main() {
+            vTexCoord = texCoord;
+            if (mode < 0.5) {
+                // Смещение в пикселях переводим в координаты отсечения
+                vec4 pos = gl_ModelViewProjectionMatrix * vec4(anchor, 1.0);
+                pos.xy += offset * 2.0 / viewport * pos.w;
+                gl_Position = pos;
+            } else {
+                vec3 pos = anchor + axisU * offset.x + axisV * offset.y;
+                gl_Position = gl_ModelViewProjectionMatrix * vec4(pos, 1.0);
+            }
+        }
+    """
+
+    FRAGMENT_SHADER = """
+        #version 120
+        uniform sampler2D texture;
+        varying vec2 vTexCoord;
+        void main() {
+            vec4 color = texture2D(texture, vTexCoord);
+            if (color.a == 0.0)
+                discard;
+            gl_FragColor = color;
+        }
+    """
+
+    # Названия атрибутов вершин и число их компонент
+    ATTRIBUTES = (("anchor", 3), ("offset", 2), ("texCoord", 2),
+                  ("mode", 1), ("axisU", 3), ("axisV", 3))
+
+    def __init__(self, mode: int = CAMERA, pixelScale: float = 0.25,
+                 parentItem=None):
+        super().__init__(parentItem=parentItem)
+        # Режим ориентации надписей
+        self.mode = mode
+        # Сколько пикселей экрана на пиксель картинки в режиме CAMERA
+        self.pixelScale = pixelScale
+        self.program = None
+        # Атрибут -> массив значений для всех вершин
+        self.__attributes = None
+
+    def setMode(self, mode: int):
+        self.mode = mode
+        self.updateLayout()
+
+    def updateLayout(self, mats: np.ndarray | None = None):
+        """
+        Пересчитываем атрибуты вершин по матрицам положения надписей.
+        Для режима CAMERA из матрицы берётся только центр надписи
+        """
+        n = len(self.labels)
+        if not n:
+            self.__attributes = None
+            self.update()
+            return
+
+        mats = self._labelMatrices(mats)
+        h, w = self._sizes
+
+        # Углы в порядке TextAtlasItem: (строка, столбец) картинки
+        rows = np.zeros((n, 4), dtype=np.float32)
+        cols = np.zeros((n, 4), dtype=np.float32)
+        rows[:, 1:3] = h[:, None]
+        cols[:, 2:] = w[:, None]
+
+        offset = np.empty((n, 4, 2), dtype=np.float32)
+        if self.mode == self.CAMERA:
+            # Центр надписи в координатах сцены
+            center = np.zeros((n, 4), dtype=np.float32)
+            center[:, 0] = h / 2
+            center[:, 1] = w / 2
+            center[:, 3] = 1
+            anchor = np.einsum("nij,nj->ni", mats, center)[:, :3]
+            # Первая строка картинки - верх надписи на экране
+            offset[:, :, 0] = (cols - w[:, None] / 2) * self.pixelScale
+            offset[:, :, 1] = (h[:, None] / 2 - rows) * self.pixelScale
+        else:
+            anchor = mats[:, :3, 3]
+            offset[:, :, 0] = rows
+            offset[:, :, 1] = cols
+
+        attributes = {}
+        attributes["anchor"] = np.repeat(anchor, 4, axis=0)
+        attributes["offset"] = offset.reshape(-1, 2)
+        attributes["texCoord"] = self._texCoords
+        attributes["mode"] = np.full(n * 4, self.mode, dtype=np.float32)
+        # Оси x и y надписи в координатах сцены
+        attributes["axisU"] = np.repeat(mats[:, :3, 0], 4, axis=0)
+        attributes["axisV"] = np.repeat(mats[:, :3, 1], 4, axis=0)
+        self.__attributes = {k: np.ascontiguousarray(v, dtype=np.float32)
+                             for k, v in attributes.items()}
+        self.update()
+
+    def __compile(self):
+        from OpenGL.GL import shaders
+        self.program = shaders.compileProgram(
+            shaders.compileShader(self.VERTEX_SHADER, GL.GL_VERTEX_SHADER),
+            shaders.compileShader(self.FRAGMENT_SHADER, GL.GL_FRAGMENT_SHADER))
+
+    def paint(self):
+        if self.__attributes is None:
+            return
+        if self.program is None:
+            self.__compile()
+        if self._needUpload:
+            self._uploadTexture()
+            self._needUpload = False
+
+        self.setupGLState()
+        GL.glUseProgram(self.program)
+        GL.glActiveTexture(GL.GL_TEXTURE0)
+        GL.glBindTexture(GL.GL_TEXTURE_2D, self.texture)
+        GL.glUniform1i(GL.glGetUniformLocation(self.program, "texture"), 0)
+        viewport = GL.glGetIntegerv(GL.GL_VIEWPORT)
+        GL.glUniform2f(GL.glGetUniformLocation(self.program, "viewport"),
+                       float(viewport[2]), float(viewport[3]))
+
+        locations = []
+        try:
+            for name, size in self.ATTRIBUTES:
+                loc = GL.glGetAttribLocation(self.program, name)
+                if loc < 0:
+                    # Атрибут выброшен компилятором
+                    continue
+                GL.glEnableVertexAttribArray(loc)
+                locations.append(loc)
+                GL.glVertexAttribPointer(loc, size, GL.GL_FLOAT, GL.GL_FALSE,
+                                         0, self.__attributes[name])
+            GL.glDrawArrays(GL.GL_QUADS, 0, len(self.__attributes["anchor"]))
+        finally:
+            for loc in locations:
+                GL.glDisableVertexAttribArray(loc)
+            GL.glBindTexture(GL.GL_TEXTURE_2D, 0)
+            GL.glUseProgram(0)
+
+
+def _rgba(color) -> tuple:
+    """
+    Цвет линии: (r, g, b, a) от 0 до 1, строка pyqtgraph или QColor
+    """
+    if isinstance(color, str):
+        color = pg.mkColor(color)
+    if isinstance(color, QtGui.QColor):
+        return color.getRgbF()
+    return tuple(color)
+
+
+def _resizeBuffer(vbo, oldBytes: int, newBytes: int):
+    """
+    Создаём буфер вершин на newBytes байт и копируем в него
+    oldBytes байт старого буфера vbo, который удаляется.
+    Новый буфер остаётся привязанным к GL_ARRAY_BUFFER
+    """
+    data = None
+    # glCopyBufferSubData есть только с OpenGL 3.1. Без него
+    # старые байты читаем в память и передаём в новый буфер заново
+    canCopy = bool(GL.glCopyBufferSubData)
+    if vbo is not None and oldBytes and not canCopy:
+        GL.glBindBuffer(GL.GL_ARRAY_BUFFER, vbo)
+        data = GL.glGetBufferSubData(GL.GL_ARRAY_BUFFER, 0, oldBytes)
+
+    newVbo = GL.glGenBuffers(1)
+    GL.glBindBuffer(GL.GL_ARRAY_BUFFER, newVbo)
+    GL.glBufferData(GL.GL_ARRAY_BUFFER, newBytes, None, GL.GL_DYNAMIC_DRAW)
+    if vbo is not None:
+        if data is not None:
+            GL.glBufferSubData(GL.GL_ARRAY_BUFFER, 0, oldBytes, data)
+        elif oldBytes:
+            # Копируем внутри видеокарты
+            GL.glBindBuffer(GL.GL_COPY_READ_BUFFER, vbo)
+            GL.glCopyBufferSubData(GL.GL_COPY_READ_BUFFER, GL.GL_ARRAY_BUFFER,
+                                   0, 0, oldBytes)
+            GL.glBindBuffer(GL.GL_COPY_READ_BUFFER, 0)
+        GL.glDeleteBuffers(1, [vbo])
+    return newVbo
+
+
+def _points(points) -> np.ndarray:
+    return np.ascontiguousarray(points, dtype=np.float32).reshape(-1, 3)
+
+
+class LineItem(GLGraphicsItem):
+    """
+    Линия траектории в собственном буфере вершин OpenGL.
+    Буфер выделяется с запасом, поэтому append и update
+    передают в видеокарту только изменившиеся байты (glBufferSubData),
+    а не весь массив, как GLLinePlotItem.setData.
+    Массивы float32 (N, 3) принимаются без копирования
+    и передаются в видеокарту при следующей отрисовке кадра
+    """
+
+    def __init__(self, pos=None, color=(0, 0, 1, 1), width: float = 1,
+                 antialias: bool = True, capacity: int = 1024,
+                 parentItem=None):
+        super().__init__(parentItem=parentItem)
+        self.setGLOptions("additive")
+        self.color = color
+        self.width = width
+        self.antialias = antialias
+        self.vbo = None
+        # Сколько точек в линии и на сколько выделен буфер
+        self.size = 0
+        self.capacity = capacity
+        # Размер буфера, который уже выделен в видеокарте
+        self.__vboCapacity = 0
+        # Ещё не переданные части линии: (первая точка, массив)
+        self.__pending = []
+        # Рисуемая часть линии: первая точка и количество, None - до конца
+        self.drawFirst = 0
+        self.drawCount = None
+        if pos is not None:
+            self.setData(pos)
+
+    def __reserve(self, size: int):
+        # Запас увеличивается вдвое, как у CoordsBuffer
+        while self.capacity < size:
+            self.capacity *= 2
+
+    def setData(self, pos=None, color=None, width=None, antialias=None):
+        """
+        Заменяем все точки линии
+        """
+        if color is not None:
+            self.color = color
+        if width is not None:
+            self.width = width
+        if antialias is not None:
+            self.antialias = antialias
+        if pos is not None:
+            pos = _points(pos)
+            self.__reserve(len(pos))
+            self.size = len(pos)
+            # Прежние части всё равно будут перезаписаны
+            self.__pending = [(0, pos)]
+        self.update()
+
+    def append(self, points):
+        """
+        Добавляем точки в конец линии
+        """
+        points = _points(points)
+        if not len(points):
+            return
+        self.__reserve(self.size + len(points))
+        self.__pending.append((self.size, points))
+        self.size += len(points)
+        self.update()
+
+    def update(self, start: int | None = None, points=None):
+        """
+        Заменяем точки линии, начиная с индекса start.
+        Без аргументов - только просим перерисовать кадр
+        """
+        if start is not None and points is not None:
+            points = _points(points)
+            if start < 0 or start + len(points) > self.size:
+                raise IndexError("Точки выходят за пределы линии")
+            self.__pending.append((start, points))
+        super().update()
+
+    def setDrawRange(self, first: int = 0, count: int | None = None):
+        """
+        Рисуем только count точек, начиная с first.
+        Буфер в видеокарте при этом не меняется
+        """
+        self.drawFirst = first
+        self.drawCount = count
+        super().update()
+
+    @timed("uploadLine")
+    def flush(self):
+        """
+        Передаём накопленные изменения в видеокарту.
+        Вызывается при отрисовке, контекст OpenGL должен быть текущим
+        """
+        itemSize = 3 * 4
+        if self.vbo is None or self.__vboCapacity < self.capacity:
+            # Уже переданные точки переносятся в новый буфер
+            self.vbo = _resizeBuffer(self.vbo, self.__vboCapacity * itemSize,
+                                     self.capacity * itemSize)
+            self.__vboCapacity = self.capacity
+        else:
+            GL.glBindBuffer(GL.GL_ARRAY_BUFFER, self.vbo)
+
+        for start, points in self.__pending:
+            GL.glBufferSubData(GL.GL_ARRAY_BUFFER, start * itemSize,
+                               points.nbytes, points)
+        self.__pending = []
+
+    def release(self):
+        """
+        Удаляем буфер вершин из видеокарты.
+        Вызывается, пока линия ещё на графике: нужен контекст OpenGL виджета
+        """
+        if self.vbo is None:
+            return
+        view = self.view()
+        if view is not None and view.context() is not None:
+            view.makeCurrent()
+        GL.glDeleteBuffers(1, [self.vbo])
+        self.vbo = None
+        self.__vboCapacity = 0
+
+    def paint(self):
+        if not self.size:
+            return
+        self.setupGLState()
+
+        try:
+            self.flush()
+            GL.glEnableClientState(GL.GL_VERTEX_ARRAY)
+            GL.glVertexPointer(3, GL.GL_FLOAT, 0, None)
+
+            GL.glColor4f(*_rgba(self.color))
+            GL.glLineWidth(self.width)
+
+            if self.antialias:
+                GL.glEnable(GL.GL_LINE_SMOOTH)
+                GL.glEnable(GL.GL_BLEND)
+                GL.glBlendFunc(GL.GL_SRC_ALPHA, GL.GL_ONE_MINUS_SRC_ALPHA)
+                GL.glHint(GL.GL_LINE_SMOOTH_HINT, GL.GL_NICEST)
+
+            first = min(self.drawFirst, self.size)
+            count = self.size - first
+            if self.drawCount is not None:
+                count = min(self.drawCount, count)
+            GL.glDrawArrays(GL.GL_LINE_STRIP, first, count)
+        finally:
+            GL.glDisableClientState(GL.GL_VERTEX_ARRAY)
+            GL.glBindBuffer(GL.GL_ARRAY_BUFFER, 0)
+
+
+class BatchLine:
+    """
+    Линия в общем буфере BatchLineItem.
+    Повторяет методы LineItem, которыми пользуется график:
+    setData, setDrawRange и setVisible, но ничего не рисует сама.
+    Под линию в буфере занято capacity точек начиная с offset,
+    из них заполнено size
+    """
+
+    __slots__ = ("batch", "offset", "capacity", "size", "color",
+                 "drawFirst", "drawCount", "isVisible")
+
+    def __init__(self, batch: "BatchLineItem", offset: int, capacity: int, color):
+        self.batch = batch
+        self.offset = offset
+        self.capacity = capacity
+        self.size = 0
+        self.color = color
+        # Рисуемая часть линии: первая точка и количество, None - до конца
+        self.drawFirst = 0
+        self.drawCount = None
+        self.isVisible = True
+
+    def setData(self, pos=None, color=None, width=None, antialias=None):
+        """
+        Заменяем точки или цвет линии.
+        Толщина и сглаживание общие для всех линий буфера
+        """
+        self.batch.setLineData(self, pos, color, width, antialias)
+
+    def setDrawRange(self, first: int = 0, count: int | None = None):
+        self.drawFirst = first
+        self.drawCount = count
+        self.batch.invalidateRanges()
+
+    def setVisible(self, isOn: bool):
+        self.isVisible = isOn
+        self.batch.invalidateRanges()
+
+    def visible(self) -> bool:
+        return self.isVisible
+
+    def show(self):
+        self.setVisible(True)
+
+    def hide(self):
+        self.setVisible(False)
+
+
+class BatchLineItem(GLGraphicsItem):
+    """
+    Много линий в одном буфере вершин OpenGL.
+    Точки всех линий лежат подряд, у каждой вершины свой цвет,
+    а линии рисуются одним вызовом glMultiDrawArrays:
+    каждая своим отрезком буфера, поэтому соседние линии не соединяются.
+    Спрятать линию или нарисовать её часть - значит поменять
+    отрезки для glMultiDrawArrays, а сменить цвет - переписать
+    цвета её вершин, буфер при этом не перестраивается
+    """
+
+    def __init__(self, width: float = 1, antialias: bool = True,
+                 capacity: int = 65536, parentItem=None):
+        super().__init__(parentItem=parentItem)
+        self.setGLOptions("additive")
+        self.width = width
+        self.antialias = antialias
+        self.lines = []
+        # Сколько точек буфера занято линиями и на сколько он выделен
+        self.size = 0
+        self.capacity = capacity
+        # Буферы точек и цветов в видеокарте и на сколько точек они выделены
+        self.__vbo = {"pos": None, "color": None}
+        self.__vboCapacity = 0
+        # Ещё не переданные данные: (буфер, первая точка, массив)
+        self.__pending = []
+        # Начала и длины рисуемых отрезков, None - пересчитать перед кадром
+        self.__ranges = None
+        # Места, освобождённые перенесёнными линиями: [(первая точка, точек)],
+        # по возрастанию первой точки, соседние места объединены
+        self.__free = []
+
+    def __alloc(self, count: int) -> int:
+        # Первое подходящее свободное место, иначе место в конце буфера
+        for i, (offset, size) in enumerate(self.__free):
+            if size >= count:
+                if size == count:
+                    del self.__free[i]
+                else:
+                    self.__free[i] = (offset + count, size - count)
+                return offset
+        offset = self.size
+        self.size += count
+        while self.capacity < self.size:
+            self.capacity *= 2
+        return offset
+
+    def __release(self, offset: int, count: int):
+        # Возвращаем место в список свободных и объединяем его с соседними
+        free = self.__free
+        i = bisect.bisect(free, (offset, count))
+        if i < len(free) and offset + count == free[i][0]:
+            count += free.pop(i)[1]
+        if i and free[i - 1][0] + free[i - 1][1] == offset:
+            i -= 1
+            offset, prev = free.pop(i)
+            count += prev
+        if offset + count == self.size:
+            # Место в конце буфера просто отдаётся следующим линиям
+            self.size = offset
+        else:
+            free.insert(i, (offset, count))
+
+    def addLine(self, pos, color=(0, 0, 1, 1)) -> BatchLine:
+        """
+        Добавляем линию в конец буфера.
+        Место занимается по её длине, линию потом можно заменить
+        на такую же или более короткую без переноса
+        """
+        pos = _points(pos)
+        line = BatchLine(self, self.__alloc(len(pos)), len(pos), color)
+        self.lines.append(line)
+        self.setLineData(line, pos, color)
+        return line
+
+    def setLineData(self, line: BatchLine, pos=None, color=None,
+                    width=None, antialias=None):
+        if width is not None:
+            self.width = width
+        if antialias is not None:
+            self.antialias = antialias
+        if pos is not None:
+            pos = _points(pos)
+            if len(pos) > line.capacity:
+                # На старом месте линия не помещается, переносим её
+                # в свободное место или в конец, цвета на новом месте
+                # тоже нужно записать. Старое место освобождается раньше,
+                # чтобы его можно было занять вместе с соседним свободным
+                self.__release(line.offset, line.capacity)
+                line.offset = self.__alloc(len(pos))
+                line.capacity = len(pos)
+                if color is None:
+                    color = line.color
+            line.size = len(pos)
+            self.__pending.append(("pos", line.offset, pos))
+            self.__ranges = None
+        if color is not None:
+            line.color = color
+            rgba = np.round(np.array(_rgba(color)) * 255).astype(np.uint8)
+            self.__pending.append(("color", line.offset,
+                                   np.tile(rgba, (line.capacity, 1))))
+        self.update()
+
+    def invalidateRanges(self):
+        """
+        Видимость или рисуемая часть линий поменялась
+        """
+        self.__ranges = None
+        self.update()
+
+    def __drawRanges(self):
+        firsts = []
+        counts = []
+        for line in self.lines:
+            if not line.isVisible:
+                continue
+            first = min(line.drawFirst, line.size)
+            count = line.size - first
+            if line.drawCount is not None:
+                count = min(line.drawCount, count)
+            if count > 0:
+                firsts.append(line.offset + first)
+                counts.append(count)
+        return np.array(firsts, dtype=np.int32), np.array(counts, dtype=np.int32)
+
+    def flush(self):
+        """
+        Передаём накопленные изменения в видеокарту.
+        Вызывается при отрисовке, контекст OpenGL должен быть текущим
+        """
+        itemSizes = {"pos": 3 * 4, "color": 4}
+        if self.__vboCapacity < self.capacity:
+            for name, itemSize in itemSizes.items():
+                self.__vbo[name] = _resizeBuffer(self.__vbo[name],
+                                                 self.__vboCapacity * itemSize,
+                                                 self.capacity * itemSize)
+            self.__vboCapacity = self.capacity
+        for name, start, data in self.__pending:
+            GL.glBindBuffer(GL.GL_ARRAY_BUFFER, self.__vbo[name])
+            GL.glBufferSubData(GL.GL_ARRAY_BUFFER, start * itemSizes[name],
+                               data.nbytes, data)
+        self.__pending = []
+
+    def release(self):
+        """
+        Удаляем буферы точек и цветов из видеокарты.
+        Вызывается, пока объект ещё на графике: нужен контекст OpenGL виджета
+        """
+        if self.__vbo["pos"] is None:
+            return
+        view = self.view()
+        if view is not None and view.context() is not None:
+            view.makeCurrent()
+        GL.glDeleteBuffers(2, [self.__vbo["pos"], self.__vbo["color"]])
+        self.__vbo = {"pos": None, "color": None}
+        self.__vboCapacity = 0
+
+    def paint(self):
+        if self.__ranges is None:
+            self.__ranges = self.__drawRanges()
+        firsts, counts = self.__ranges
+        if not len(firsts):
+            return
+        self.setupGLState()
+
+        try:
+            self.flush()
+            GL.glEnableClientState(GL.GL_VERTEX_ARRAY)
+            GL.glBindBuffer(GL.GL_ARRAY_BUFFER, self.__vbo["pos"])
+            GL.glVertexPointer(3, GL.GL_FLOAT, 0, None)
+            GL.glEnableClientState(GL.GL_COLOR_ARRAY)
+            GL.glBindBuffer(GL.GL_ARRAY_BUFFER, self.__vbo["color"])
+            GL.glColorPointer(4, GL.GL_UNSIGNED_BYTE, 0, None)
+            GL.glLineWidth(self.width)
+
+            if self.antialias:
+                GL.glEnable(GL.GL_LINE_SMOOTH)
+                GL.glEnable(GL.GL_BLEND)
+                GL.glBlendFunc(GL.GL_SRC_ALPHA, GL.GL_ONE_MINUS_SRC_ALPHA)
+                GL.glHint(GL.GL_LINE_SMOOTH_HINT, GL.GL_NICEST)
+
+            GL.glMultiDrawArrays(GL.GL_LINE_STRIP, firsts, counts, len(firsts))
+        finally:
+            GL.glDisableClientState(GL.GL_COLOR_ARRAY)
+            GL.glDisableClientState(GL.GL_VERTEX_ARRAY)
+            GL.glBindBuffer(GL.GL_ARRAY_BUFFER, 0)
+
+
+def cropQImage(img: QtGui.QImage, bg_color: QtGui.QColor) -> QtGui.QImage | None:
+    """
+    Обрезаем по краям изображения место, залитое цветом фона.
+    Если на изображении ничего нет, возвращаем None
+    """
+    width = img.width()
+    height = img.height()
+    if not width or not height:
+        return None
+    # Приводим к формату, где пиксель - число 0xAARRGGBB,
+    # для RGB32 и ARGB32 копирования не будет
+    argb = img
+    if img.format() not in (QtGui.QImage.Format_RGB32,  # type: ignore
+                            QtGui.QImage.Format_ARGB32):  # type: ignore
+        argb = img.convertToFormat(QtGui.QImage.Format_ARGB32)  # type: ignore
+
+    # Смотрим на байты изображения как на массив пикселей без копирования
+    pixels = np.frombuffer(argb.constBits(), dtype=np.uint32,  # type: ignore
+                           count=height * argb.bytesPerLine() // 4)
+    pixels = pixels.reshape(height, -1)[:, :width]
+    mask = pixels != np.uint32(bg_color.rgba())
+
+    # Строки и столбцы, в которых есть что-то кроме фона
+    rows = np.flatnonzero(mask.any(1))
+    if not len(rows):
+        return None
+    cols = np.flatnonzero(mask[rows[0]:rows[-1] + 1].any(0))
+
+    bottom, top = rows[0], rows[-1]
+    left, right = cols[0], cols[-1]
+
+    width = right - left + 1
+    height = top - bottom + 1
+    if width > 1 and height > 1:
+        return img.copy(left, bottom, width, height)
+    return None
+
+
+class ChartLoaderSignals(QtCore.QObject):
+    # Прочитано байт, всего байт
+    progress = QtCore.Signal(object, object)
+    # Разобранный график
+    finished = QtCore.Signal(object)
+    # Текст ошибки
+    failed = QtCore.Signal(str)
+    canceled = QtCore.Signal()
+
+
+class TimingSignals(QtCore.QObject):
+    # Этап и его длительность в секундах, см. flyplot.timing
+    recorded = QtCore.Signal(str, float)
+
+
+# Замеры этапов выдаются сигналом, пока они включены
+timingSignals = TimingSignals()
+timings.listeners.append(timingSignals.recorded.emit)
+
+
+class ChartLoader(QtCore.QRunnable):
+    """
+    Разбор файла графика в пуле потоков.
+    Результат передаётся в поток интерфейса через signals
+    """
+
+    def __init__(self, data_file: str, cache: ChartCache | None = None,
+                 isMapped: bool = False, dtype=np.float32):
+        super().__init__()
+        self.setAutoDelete(False)
+        self.data_file = data_file
+        self.cache = cache
+        # Файл открывается через mmap без загрузки в память
+        self.isMapped = isMapped
+        # Точность координат траектории, которая готовится для графика
+        self.dtype = dtype
+        self.signals = ChartLoaderSignals()
+        self.__isCanceled = False
+
+    def cancel(self):
+        self.__isCanceled = True
+
+    @property
+    def canceled(self) -> bool:
+        return self.__isCanceled
+
+    def __progress(self, read: int, total: int):
+        if self.__isCanceled:
+            raise LoadCanceled()
+        self.signals.progress.emit(read, total)
+
+    def run(self):
+        try:
+            if self.isMapped:
+                chart = MappedTrajectory(self.data_file, progress=self.__progress)
+            else:
+                if self.cache is not None:
+                    chart = self.cache.load(self.data_file, self.__progress)
+                else:
+                    chart = loadChart(self.data_file, self.__progress)
+                if chart["type"] == "3D":
+                    # Траектория и пирамида строятся здесь,
+                    # поток интерфейса только создаёт объекты OpenGL
+                    chart = prepareChart(chart, self.dtype)
+        except LoadCanceled:
+            self.signals.canceled.emit()
+        except Exception as e:
+            self.signals.failed.emit(f"Не удалось загрузить {self.data_file}:\n{e}")
+        else:
+            # Отмена могла прийти уже после разбора, например при попадании в кэш
+            if self.__isCanceled:
+                if isinstance(chart, MappedTrajectory):
+                    chart.close()
+                self.signals.canceled.emit()
+            else:
+                self.signals.finished.emit(chart)
+
+
+# Направления каких осей влияют на положение названия оси
+AXIS_LABEL_DEPS = {"x": "yz", "y": "xz", "z": "xyz"}
+
+
+class Graph3DWidjet(gl.GLViewWidget):
+    # Поменялось окно времени: начало и конец в секундах
+    timeWindowChanged = QtCore.Signal(float, float)
+    # Профиль кадров записан в файл
+    profileSaved = QtCore.Signal(str)
+
+    def __init__(self, data_file="", *args, **kargs):
+        super().__init__(*args, **kargs)
+
+        # Задаём цвет фона по умолчанию стоит черный, будет белый
+        self.setBackgroundColor("w")
+
+        self.graphs = []
+        self.axis = {}
+        self.grid = {}
+        # Части осей, которые нужно перерисовать: (ось, "label" или "value")
+        self.__dirtyAxis = set()
+        # Матрицы подписей: (ось, часть, направления осей) -> массив (N, 4, 4)
+        self.__layoutCache = {}
+        # Перерисовка осей откладывается до следующего цикла событий,
+        # чтобы несколько событий мыши дали одну перерисовку
+        self.__axisTimer = QtCore.QTimer(self)
+        self.__axisTimer.setSingleShot(True)
+        self.__axisTimer.setInterval(0)
+        self.__axisTimer.timeout.connect(self.__onAxisTimer)
+        # Подписи осей рисуются шейдером лицом к камере (BillboardTextItem)
+        self.billboardText = False
+        self.__initAxis()
+        self.__initGrid()
+
+        # Кэш разобранных файлов, None - всегда разбирать файл заново
+        self.cache: ChartCache | None = chartCache
+        # Состояние режима слежения за растущим файлом
+        self.__follow = {}
+        # Таймер чтения новых строк, один на все включения слежения
+        self.__followTimer = QtCore.QTimer(self)
+        self.__followTimer.timeout.connect(self.__followUpdate)
+        # Фоновые загрузки графиков
+        self.__loaders = []
+        # Файлы больше этого размера открываются через mmap без загрузки,
+        # в памяти остаётся только обзор траектории
+        self.outOfCoreSize = 1024 * 1024 * 1024
+        # Сколько точек окна времени разбирать из такого файла
+        self.detailPoints = 2_000_000
+        # Точные точки окна разбираются, когда окно перестаёт меняться
+        self.__detailTimer = QtCore.QTimer(self)
+        self.__detailTimer.setSingleShot(True)
+        self.__detailTimer.setInterval(200)
+        self.__detailTimer.timeout.connect(self.__loadDetails)
+        # Сколько точек траектории выводить на пиксель её размера на экране
+        self.lodDensity = 2
+        # Общие текстуры надписей: ключ текста -> текстура OpenGL,
+        # не больше TEXT_CACHE_SIZE, давно не нужные удаляются первыми
+        self.textTextures = OrderedDict()
+        # Точность хранения точек траекторий, для вывода хватает float32
+        self.dtype = np.float32
+        # Объекты отрисовки траекторий:
+        # траектория -> {"plot": линия, "lod": пирамида, "lodLevel": уровень,
+        #                "window": рисуемые индексы точек (от, до) или None,
+        #                "envelope": трубка разброса или None}
+        self.plots = {}
+        # Если за раз добавляется столько графиков или больше,
+        # они рисуются одним общим буфером (BatchLineItem)
+        self.batchThreshold = 16
+        self.__batch = None
+        # Окно времени (от, до), в котором рисуются траектории, None - всё
+        self.timeWindow = None
+        # Воспроизведение полёта: окно времени движется со скоростью speed
+        self.__play = {"timer": QtCore.QTimer(self),
+                       "clock": QtCore.QElapsedTimer(),
+                       "speed": 1.0,
+                       "width": None}
+        self.__play["timer"].setInterval(16)
+        self.__play["timer"].timeout.connect(self.__playStep)
+        # Время кадров для надписи поверх графика и профиль нескольких кадров
+        self.__frames = {"overlay": None,
+                         "start": None,
+                         "paint": deque(maxlen=60),
+                         "interval": deque(maxlen=60),
+                         "shown": 0.0,
+                         "profile": None,
+                         "running": False,
+                         "left": 0,
+                         "path": None}
+
+        # Задаём размеры виджета
+        screen_size = self.screen().size()
+        # Минимальные размеры графика
+        min_width = round(screen_size.width() / 2.5)
+        min_height = round(screen_size.height() / 2)
+        self.setMinimumSize(min_width, min_height)
+        # график не может быть больше размеров экрана
+        self.setMaximumSize(screen_size)
+        # график можно расширять
+        self.setSizePolicy(QtWidgets.QSizePolicy.Expanding,  # type: ignore
+                           QtWidgets.QSizePolicy.Expanding)  # type: ignore
+        # Фокус остаётся на графике
+        self.setFocusPolicy(QtCore.Qt.StrongFocus)  # type: ignore
+
+        if data_file:
+            self.addChart(data_file)
+
+        # Ставим вид по умолчанию
+        self.goDefView()
+
+        # self.__testDebug()
+
+    def __testDebug(self):
+        for ax in "xyz":
+            axi = Text3DItem(ax, size=400)
+            self.addItem(axi)
+            d = {"x": 0, "y": 0, "z": 0}
+            d[ax] = 500
+            axi.translate(d["x"], d["y"], d["z"])
+
+    def Clean(self):
+        self.unfollow()
+        for view in self.plots.values():
+            if view["mapped"] is not None:
+                view["mapped"].close()
+        # Буферы и текстуры удаляются, пока объекты ещё на графике
+        for item in self.items:
+            if isinstance(item, (LineItem, BatchLineItem, TextAtlasItem)):
+                item.release()
+        self.__releaseTextTextures()
+        self.clear()
+        self.__dirtyAxis = set()
+        self.__layoutCache = {}
+        self.pause()
+        self.graphs = []
+        self.plots = {}
+        self.__batch = None
+        self.timeWindow = None
+        self.axis = {}
+        self.grid = {}
+        self.__initAxis()
+        self.__initGrid()
+        # Ставим вид по умолчанию
+        self.goDefView()
+
+        # self.__testDebug()
+
+    def __releaseTextTextures(self):
+        # Надписи с общими текстурами убираются с графика вместе с ними
+        if not self.textTextures:
+            return
+        if self.context() is not None:
+            self.makeCurrent()
+        textures = list(self.textTextures.values())
+        GL.glDeleteTextures(len(textures), textures)
+        self.textTextures.clear()
+
+    @timed("paintGL")
+    def paintGL(self, *args, **kargs):
+        frames = self.__frames
+        isWatched = frames["overlay"] is not None or frames["profile"] is not None
+        if isWatched:
+            t = self.__beginFrame()
+        # Отложенная перерисовка осей должна успеть до кадра
+        self.flushAxis()
+        self.updateLod()
+        super().paintGL(*args, **kargs)
+        if isWatched:
+            self.__endFrame(t)
+
+    def __beginFrame(self) -> float:
+        frames = self.__frames
+        t = time.perf_counter()
+        if frames["start"] is not None:
+            frames["interval"].append(t - frames["start"])
+        frames["start"] = t
+        profile = frames["profile"]
+        if profile is not None and not frames["running"]:
+            # Профиль идёт непрерывно от начала первого кадра
+            # до конца последнего, вместе с событиями между кадрами
+            profile.enable()
+            frames["running"] = True
+        return t
+
+    def __endFrame(self, t: float):
+        frames = self.__frames
+        now = time.perf_counter()
+        frames["paint"].append(now - t)
+
+        if frames["profile"] is not None:
+            frames["left"] -= 1
+            if frames["left"] <= 0:
+                profile = frames["profile"]
+                profile.disable()
+                frames["profile"] = None
+                frames["running"] = False
+                profile.dump_stats(frames["path"])
+                self.profileSaved.emit(frames["path"])
+
+        overlay = frames["overlay"]
+        # Надпись обновляется не чаще 4 раз в секунду
+        if overlay is not None and now - frames["shown"] > 0.25:
+            frames["shown"] = now
+            paint = sum(frames["paint"]) / len(frames["paint"])
+            text = f"отрисовка {paint * 1000:.1f} мс"
+            if frames["interval"]:
+                interval = sum(frames["interval"]) / len(frames["interval"])
+                text = (f"кадр {interval * 1000:.1f} мс, {1 / interval:.0f} FPS\n"
+                        + text)
+            overlay.setText(text)
+            overlay.adjustSize()
+
+    def setFrameOverlay(self, isOn: bool = True):
+        """
+        Показываем в углу графика время кадра и FPS.
+        Время отрисовки - это время paintGL на процессоре,
+        FPS считается по промежуткам между кадрами, пока график перерисовывается
+        """
+        frames = self.__frames
+        if isOn and frames["overlay"] is None:
+            overlay = QtWidgets.QLabel(self)
+            overlay.setStyleSheet("background-color: rgba(255, 255, 255, 180);"
+                                  "color: black; padding: 2px;")
+            overlay.setAttribute(QtCore.Qt.WA_TransparentForMouseEvents)  # type: ignore
+            overlay.move(4, 4)
+            overlay.show()
+            frames["overlay"] = overlay
+            frames["start"] = None
+            frames["paint"].clear()
+            frames["interval"].clear()
+            self.update()
+        elif not isOn and frames["overlay"] is not None:
+            frames["overlay"].deleteLater()
+            frames["overlay"] = None
+
+    def profileFrames(self, count: int = 100, path: str | None = None) -> str:
+        """
+        Записываем профиль cProfile следующих count кадров в файл path,
+        по умолчанию во временную папку. Когда профиль записан,
+        выдаётся сигнал profileSaved с именем файла.
+        Профиль открывается pstats или snakeviz
+        """
+        frames = self.__frames
+        if frames["running"]:
+            frames["profile"].disable()
+            frames["running"] = False
+        if path is None:
+            path = os.path.join(tempfile.gettempdir(),
+                                time.strftime("flyplot-%Y%m%d-%H%M%S.prof"))
+        frames["profile"] = cProfile.Profile()
+        frames["left"] = count
+        frames["path"] = path
+        self.update()
+        return path
+
+    def updateLod(self):
+        """
+        Выбираем уровни детализации графиков под текущее положение камеры.
+        Данные графика меняются только при смене уровня
+        """
+        # Сколько пикселей приходится на единицу длины на расстоянии камеры
+        dist = self.opts["distance"]
+        worldHeight = 2 * dist * math.tan(math.radians(self.opts["fov"]) / 2)
+        if worldHeight <= 0:
+            return
+        pixelPerUnit = self.height() / worldHeight
+
+        for view in self.plots.values():
+            lod = view["lod"]
+            if lod is None or view["detail"] is not None:
+                continue
+            target = lod.diagonal * pixelPerUnit * self.lodDensity
+            if view["window"] is not None:
+                # В окне времени только часть точек,
+                # детализация нужна по ним, а не по всей траектории
+                i0, i1 = view["window"]
+                target *= len(lod.coords[0]) / max(i1 - i0, 1)
+            level = lod.select(target)
+            if level != view["lodLevel"]:
+                view["lodLevel"] = level
+                view["plot"].setData(pos=lod.coords[level], antialias=True)
+                self.__applyDrawRange(view)
+
+    def timeRange(self):
+        """
+        Время от начала самой ранней до конца самой поздней траектории,
+        None - если траекторий нет
+        """
+        bounds = [(traj.times[0], traj.times[-1])
+                  for traj in self.graphs if len(traj)]
+        if not bounds:
+            return None
+        return (float(min(b[0] for b in bounds)),
+                float(max(b[1] for b in bounds)))
+
+    def setTimeWindow(self, t0: float, t1: float):
+        """
+        Рисуем только точки траекторий со временем от t0 до t1.
+        Точки ищутся двоичным поиском по times, а линия рисуется
+        частью уже переданного в видеокарту буфера
+        """
+        self.timeWindow = (t0, t1)
+        for traj in self.plots:
+            self.__updateTimeWindow(traj)
+        self.timeWindowChanged.emit(t0, t1)
+
+    def clearTimeWindow(self):
+        """
+        Снова рисуем траектории целиком
+        """
+        self.pause()
+        self.timeWindow = None
+        for view in self.plots.values():
+            self.__restoreOverview(view)
+            view["window"] = None
+            self.__applyDrawRange(view)
+        rng = self.timeRange()
+        if rng is not None:
+            self.timeWindowChanged.emit(*rng)
+
+    def __updateTimeWindow(self, traj: Trajectory):
+        view = self.plots[traj]
+        if view["detail"] is not None and view["detail"] != self.timeWindow:
+            self.__restoreOverview(view)
+        if self.timeWindow is None:
+            view["window"] = None
+        else:
+            t0, t1 = self.timeWindow
+            view["window"] = (int(np.searchsorted(traj.times, t0, "left")),
+                              int(np.searchsorted(traj.times, t1, "right")))
+        self.__applyDrawRange(view)
+        if view["mapped"] is not None and self.timeWindow is not None:
+            # Пока окно меняется, видна часть обзора,
+            # точные точки разбираются, когда оно остановится
+            self.__detailTimer.start()
+
+    def __loadDetails(self):
+        if self.timeWindow is None:
+            return
+        t0, t1 = self.timeWindow
+        for view in self.plots.values():
+            mapped: MappedTrajectory = view["mapped"]
+            if mapped is None or view["detail"] == self.timeWindow:
+                continue
+            detail = mapped.window(t0, t1, self.detailPoints)
+            view["plot"].setData(pos=detail.coords)
+            view["plot"].setDrawRange()
+            view["detail"] = self.timeWindow
+
+    def __restoreOverview(self, view: dict):
+        # Вместо точных точек окна снова рисуем обзор
+        if view["detail"] is None:
+            return
+        view["detail"] = None
+        view["plot"].setData(pos=view["lod"].coords[view["lodLevel"]])
+        self.__applyDrawRange(view)
+
+    def __applyDrawRange(self, view: dict):
+        plot: LineItem | BatchLine = view["plot"]
+        if view["detail"] is not None:
+            # Точные точки окна рисуются целиком
+            plot.setDrawRange()
+            return
+        if view["window"] is None:
+            plot.setDrawRange()
+            return
+        i0, i1 = view["window"]
+        lod = view["lod"]
+        if lod is not None and view["lodLevel"]:
+            # Индексы исходных точек переводим в индексы точек уровня
+            indices = lod.indices[view["lodLevel"]]
+            i0 = int(np.searchsorted(indices, i0, "left"))
+            i1 = int(np.searchsorted(indices, i1, "left"))
+        plot.setDrawRange(i0, i1 - i0)
+
+    def play(self, speed: float = 1.0, width: float | None = None):
+        """
+        Воспроизводим полёт: конец окна времени движется
+        со скоростью speed секунд расчёта за секунду.
+        width - длина окна в секундах, None - начало окна остаётся на месте.
+        Если окна не было или оно уже в конце, полёт идёт с начала
+        """
+        rng = self.timeRange()
+        if rng is None:
+            return
+        if self.timeWindow is None or self.timeWindow[1] >= rng[1]:
+            self.setTimeWindow(rng[0], rng[0])
+        self.__play["speed"] = speed
+        self.__play["width"] = width
+        self.__play["clock"].start()
+        self.__play["timer"].start()
+
+    def pause(self):
+        self.__play["timer"].stop()
+
+    def isPlaying(self) -> bool:
+        return self.__play["timer"].isActive()
+
+    def setPlaySpeed(self, speed: float):
+        self.__play["speed"] = speed
+
+    def __playStep(self):
+        # Шаг считаем по реальному времени, а не по числу срабатываний таймера
+        dt = self.__play["clock"].restart() / 1000 * self.__play["speed"]
+        rng = self.timeRange()
+        if rng is None or self.timeWindow is None:
+            self.pause()
+            return
+        t0, t1 = self.timeWindow
+        t1 = min(t1 + dt, rng[1])
+        if self.__play["width"] is not None:
+            t0 = max(rng[0], t1 - self.__play["width"])
+        if t1 >= rng[1]:
+            self.pause()
+        self.setTimeWindow(t0, t1)
+
+    def mouseMoveEvent(self, ev):
+
+        lpos = ev.position() if hasattr(ev, 'position') else ev.localPos()
+        diff = lpos - self.mousePos
+        self.mousePos = lpos
+
+        if ev.buttons() == QtCore.Qt.MouseButton.RightButton:
+            self.orbit(-diff.x(), diff.y())
+        elif ev.buttons() == QtCore.Qt.MouseButton.MiddleButton:
+            self.pan(diff.x(), diff.y(), 0, relative='view')
+
+        self.paintGridByDirection()
+
+    def __initAxis(self):
+        for ax in "xyz":
+            axi = self.axis[ax] = {}
+            axi["min"] = 0
+            axi["max"] = 1000
+            axi["space"] = 100
+            axi["size"] = axi["max"] - axi["min"]
+            axi["delta"] = (axi["min"] + axi["max"]) / 2
+            # Основное направление оси
+            axi["amax"] = max(axi["max"], axi["min"], key=lambda x: abs(x))
+            axi["amin"] = min(axi["max"], axi["min"], key=lambda x: abs(x))
+            # направление оси по умолчанию считаем нормальным
+            axi["direction"] = 1
+            if axi["amin"] > 0:
+                axi["direction"] = -1
+            # Делений оси
+            axi["value"] = {"size": axi["space"]*0.6, "offset": axi["space"]*0.4,
+                            "angle": 15, "mas": [], "pool": [],
+                            # Все подписи делений рисуются одним объектом
+                            "atlas": None}
+            # Подписей осей
+            axi["label"] = {"size": 100, "offset": 200,
+                            "step": 100, "angle": 15, "mas": [],
+                            # Объект для названий оси в режиме billboardText
+                            "atlas": None}
+            self.__initTextItems(axi)
+
+    def __initTextItems(self, axi: dict):
+        # Создаём объекты, которыми рисуются подписи оси
+        value = axi["value"]
+        label = axi["label"]
+        for part in (value, label):
+            if part["atlas"] is not None:
+                part["atlas"].release()
+                self.removeItem(part["atlas"])
+                part["atlas"] = None
+
+        if self.billboardText:
+            value["atlas"] = BillboardTextItem()
+            # Названия крупнее делений: повёрнутые к камере, они ложились бы
+            # на ряд делений, поэтому лежат в плоскости сетки за ним
+            label["atlas"] = BillboardTextItem(BillboardTextItem.PLANE)
+        else:
+            value["atlas"] = TextAtlasItem()
+
+        for part in (value, label):
+            if part["atlas"] is not None:
+                self.addItem(part["atlas"])
+                part["atlas"].setLabels(part["mas"])
+        # Названия оси рисуются сами, только если нет общего объекта
+        for l in label["mas"]:
+            l.setVisible(label["atlas"] is None)
+
+    def setBillboardText(self, isOn: bool = True):
+        """
+        Подписи осей и делений рисуются шейдером всегда лицом к камере,
+        тогда при вращении их не нужно поворачивать на процессоре
+        """
+        if isOn == self.billboardText:
+            return
+        self.billboardText = isOn
+        for ax in "xyz":
+            self.__initTextItems(self.axis[ax])
+
+    def __initGrid(self):
+        for gg in ("xy", "xz", "yz"):
+            # Создаем одну из плоскостей 3D сетки
+            self.grid[gg] = gl.GLGridItem()
+            # Задаём цвет - черный и немного прозрачный
+            self.grid[gg].setColor((0, 0, 0, 50))
+            # Добавляем объект сетки на 3D сцену
+            self.addItem(self.grid[gg])
+
+        # перерисовываем всю 3D сетку
+        self.paintGrid()
+
+    @timed("recalcAxis")
+    def recalcAxis(self):
+        # Размеры сетки меняются, сохранённые положения подписей не годятся
+        self.invalidateAxisLayout()
+        # Предельные значения точек всех графиков и сетка по ним
+        for i, ax in enumerate("xyz"):
+            lo = min((traj.min[i] for traj in self.graphs), default=0)
+            hi = max((traj.max[i] for traj in self.graphs), default=0)
+            self.axis[ax].update(gridBounds(lo, hi, self.axis[ax]["space"]))
+
+    def paintGridByDirection(self):
+        """
+        Перерисовыем плоскости относительно камеры так,
+        Чтобы нормали плоскостей смотрели на кмеру
+        """
+        camPos = self.cameraPosition()
+        for gg in self.grid:
+            # Ось нормальная плоскости
+            n = list(set("xyz") - set(gg))[0]
+            v = {"x": 0, "y": 0, "z": 0}
+            v[n] = self.axis[n]["direction"] * self.axis[n]["size"]
+            qVector = QtGui.QVector3D(v["x"], v["y"], v["z"])
+            angle = camPos.angle(qVector)
+            if angle is not None and angle > 90:
+                self.grid[gg].translate(v["x"], v["y"], v["z"])
+                self.axis[n]["direction"] *= -1
+                # Отмечаем метки осей, которые зависят от этого направления
+                self.markAxisDirty(n)
+
+    def markAxisDirty(self, n: str):
+        """
+        Отмечаем для перерисовки подписи, зависящие от направления оси n.
+        Перерисовка будет один раз перед следующим кадром
+        """
+        for ax in "xyz":
+            # Подписи делений зависят от направлений всех осей
+            self.__dirtyAxis.add((ax, "value"))
+            if n in AXIS_LABEL_DEPS[ax]:
+                self.__dirtyAxis.add((ax, "label"))
+        if not self.__axisTimer.isActive():
+            self.__axisTimer.start()
+
+    def __onAxisTimer(self):
+        if self.__dirtyAxis:
+            self.flushAxis()
+            self.update()
+
+    def flushAxis(self):
+        """
+        Перерисовываем отмеченные подписи осей
+        """
+        dirty = self.__dirtyAxis
+        if not dirty:
+            return
+        self.__dirtyAxis = set()
+        for ax in "xyz":
+            self.__paintAxisParts(ax,
+                                  (ax, "label") in dirty,
+                                  (ax, "value") in dirty)
+
+    @timed("paintGrid")
+    def paintGrid(self):
+        # проходим все плоскости сетки
+        for gg in self.grid:
+            # Сбрасываем положение плоскости
+            self.grid[gg].resetTransform()
+            # Задаём размер плоскости сетки
+            size = (self.axis[ax]["size"] for ax in gg)
+            self.grid[gg].setSize(*size)
+            # Задаём шаг сетки
+            space = (self.axis[ax]["space"] for ax in gg)
+            self.grid[gg].setSpacing(*space)
+
+        # Поворачиваем плоскти в нужном направлении
+        # Плоскость xy поворачивать не нужно
+        self.grid["xz"].rotate(90, 1, 0, 0)
+        # Плоскость yz нужно повернуть два раза
+        self.grid["yz"].rotate(90, 0, 0, 1)
+        self.grid["yz"].rotate(90, 0, 1, 0)
+
+        for gg in self.grid:
+            # Перемещения по координатам xyz
+            d = {"x": 0, "y": 0, "z": 0}
+            # Задаём перемещения внутри плоскости
+            for ax in gg:
+                d[ax] = self.axis[ax]["delta"]
+            # Ось перпендикулярная плоскости
+            n = list(set("xyz") - set(gg))[0]
+            # Перемещенеи относительно нормали
+            # По умолчанию ставим в позицию минимальную по модулю
+            d[n] = self.axis[n]["amin"]
+            if self.axis[n]["amin"] == self.axis[n]["max"]:
+                self.axis[n]["direction"] = -1
+            # Перемещаем плоскость в нужное положение относительно центра координат
+            self.grid[gg].translate(d["x"], d["y"], d["z"])
+
+        # Тепер для каждой плоскости рассмотрим как она расположена относительно камеры
+        # плоскости нужно переместить по нормали если она стоит "спиной" к камере
+        self.paintGridByDirection()
+
+    def paintAxis(self, axis_name: str):
+        if axis_name not in ("x", "y"):
+            # иначе считаем, что это z
+            axis_name = "z"
+        self.__dirtyAxis.discard((axis_name, "label"))
+        self.__dirtyAxis.discard((axis_name, "value"))
+        self.__paintAxisParts(axis_name, True, True, useCache=False)
+
+    def invalidateAxisLayout(self):
+        """
+        Сбрасываем сохранённые положения подписей.
+        Нужно вызывать, когда меняются размеры сетки или тексты подписей
+        """
+        self.__layoutCache.clear()
+
+    @timed("paintAxis")
+    def __paintAxisParts(self, axis_name: str, isLabel: bool, isValue: bool,
+                         useCache: bool = True):
+        # Положение подписей зависит только от направлений осей,
+        # таких вариантов всего 8, для каждого запоминаем матрицы подписей
+        octant = tuple(self.axis[ax]["direction"] for ax in "xyz")
+        for part, isPart in (("label", isLabel), ("value", isValue)):
+            if not isPart:
+                continue
+            items = self.axis[axis_name][part]["mas"]
+            key = (axis_name, part, octant)
+            mats = self.__layoutCache.get(key) if useCache else None
+            if mats is None or len(mats) != len(items):
+                # Матрицы всех подписей считаются сразу массивом
+                layout = labelTransforms if part == "label" else valueTransforms
+                mats = layout(self.axis, axis_name,
+                              [item.height for item in items],
+                              [item.width for item in items])
+                self.__layoutCache[key] = mats
+            for item, m in zip(items, mats):
+                if isinstance(item, Transform3D):
+                    # Надписи атласа: QMatrix4x4 строится, только если её спросят
+                    item.setMatrix(m)
+                else:
+                    item.setTransform(QtGui.QMatrix4x4(m.ravel().tolist()))
+            # Подписи передвинуты, обновляем вершины общего объекта
+            atlas = self.axis[axis_name][part]["atlas"]
+            if atlas is not None:
+                atlas.updateLayout(mats)
+
+    @timed("addChart")
+    def addChart(self, data_file: str):
+        if self.isOutOfCore(data_file):
+            self.showMapped(MappedTrajectory(data_file))
+            return
+        chart = self.__parseData(data_file)
+        if chart:
+            self.showChart(chart)
+
+    def isOutOfCore(self, data_file: str) -> bool:
+        """
+        Файл слишком большой, чтобы загружать его в память целиком.
+        Сжатые файлы через mmap не читаются, они всегда распаковываются
+        """
+        return (os.path.getsize(data_file) > self.outOfCoreSize
+                and not isCompressed(data_file))
+
+    def showMapped(self, mapped: MappedTrajectory):
+        """
+        Добавляем на график файл, открытый через mmap.
+        Рисуется обзор траектории, а точные точки -
+        только в выбранном окне времени
+        """
+        try:
+            check3D(mapped.header)
+        except ChartTypeError as e:
+            self.__showError(str(e))
+            return
+        traj = mapped.overview
+        self.showCharts([traj])
+        self.plots[traj]["mapped"] = mapped
+        if self.timeWindow is not None:
+            self.__updateTimeWindow(traj)
+
+    def addChartAsync(self, data_file: str) -> "ChartLoader":
+        """
+        Загружаем график в фоновом потоке.
+        Разбор файла идёт в пуле потоков, а на графике
+        создаётся только 3D объект, когда данные готовы.
+        Загрузка стартует в следующем цикле событий,
+        поэтому к сигналам загрузчика можно успеть подключиться
+        """
+        loader = ChartLoader(data_file, self.cache, self.isOutOfCore(data_file),
+                             self.dtype)
+        # Держим ссылку на загрузчик, пока он не закончит работу
+        self.__loaders.append(loader)
+        loader.signals.finished.connect(
+            lambda chart, ld=loader: self.__onChartLoaded(chart, ld))
+        loader.signals.failed.connect(self.__onChartFailed)
+        for sig in (loader.signals.finished,
+                    loader.signals.failed,
+                    loader.signals.canceled):
+            sig.connect(lambda *_, ld=loader: self.__loaders.remove(ld))
+        QtCore.QTimer.singleShot(
+            0, lambda: QtCore.QThreadPool.globalInstance().start(loader))
+        return loader
+
+    def __onChartLoaded(self, chart: dict | MappedTrajectory, loader: ChartLoader):
+        # Сигнал идёт в поток интерфейса через очередь,
+        # загрузку могли отменить, пока он в ней лежал
+        if loader.canceled:
+            if isinstance(chart, MappedTrajectory):
+                chart.close()
+            return
+        if isinstance(chart, MappedTrajectory):
+            self.showMapped(chart)
+            return
+        try:
+            self.showChart(check3D(chart))
+        except ChartTypeError as e:
+            self.__showError(str(e))
+
+    @Slot(str)
+    def __onChartFailed(self, error: str):
+        self.__showError(error)
+
+    def addCharts(self, paths, workers: int | None = None):
+        """
+        Добавляем сразу много графиков.
+        Файлы разбираются параллельно в пуле из workers процессов,
+        а сетка, подписи и камера пересчитываются один раз в конце
+        """
+        charts, errors = loadCharts(paths, workers, self.cache, self.dtype)
+        self.showCharts([c for c in charts if c["type"] == "3D"])
+
+        bad = [c for c in charts if c["type"] != "3D"]
+        for chart in bad:
+            self.__showError(str(ChartTypeError(chart)))
+        if errors:
+            self.__showError("Не удалось загрузить:\n" +
+                             "\n".join(f"{f}: {e}" for f, e in errors))
+
+    def showChart(self, chart: dict | Trajectory):
+        """
+        Добавляем на график уже разобранный файл
+        """
+        if chart is not None:
+            self.showCharts([chart])
+
+    @timed("showCharts")
+    def showCharts(self, charts: list):
+        """
+        Добавляем на график уже разобранные файлы:
+        словари графиков от loadChart или траектории.
+        Для словарей после prepareChart траектория и пирамида уже готовы
+        """
+        if not charts:
+            return
+
+        trajs = []
+        isBatch = len(charts) >= self.batchThreshold
+        for chart in charts:
+            lod = None
+            if isinstance(chart, Trajectory):
+                traj = chart
+            elif "trajectory" in chart:
+                traj, lod = chart["trajectory"], chart["lod"]
+            else:
+                # От словаря графика остаются только массивы точек
+                traj = Trajectory.fromChart(chart, self.dtype)
+            if lod is None:
+                lod = LodPyramid(traj.coords)
+            # Создаём объект 3D графика
+            plt = self.__newLine(traj.coords, isBatch)
+            # Пирамида детализации, на экран выводится подходящий уровень
+            self.plots[traj] = {"plot": plt,
+                                "lod": lod,
+                                "lodLevel": 0,
+                                "window": None,
+                                # Файл в режиме mmap и окно его точных точек
+                                "mapped": None,
+                                "detail": None,
+                                # Трубка разброса набора траекторий
+                                "envelope": None}
+            self.graphs.append(traj)
+            trajs.append(traj)
+            self.__updateTimeWindow(traj)
+
+        # Перестраиваем сетку под новые графики
+        self.recalcAxis()
+        self.paintGrid()
+
+        for ax in "xyz":
+            for traj in trajs:
+                # Добавляем новые подписи оси нужно
+                self.addLabel(ax, traj.label(ax))
+            # Пересчитываем подписи делений
+            self.recalcValuesAxis(ax)
+            self.paintAxis(ax)
+
+        # Переходим в вид по умолчанию, чтобы были видны
+        # Все графики в пространстве
+        self.goDefView()
+
+    def __newLine(self, coords: np.ndarray, isBatch: bool = False):
+        color = pg.mkColor('b')
+        if not isBatch:
+            # Отдельный объект линии на виджете
+            plt = LineItem(pos=coords, color=color, width=1, antialias=True)
+            self.addItem(plt)
+            return plt
+        if self.__batch is None:
+            self.__batch = BatchLineItem(width=1, antialias=True)
+            self.addItem(self.__batch)
+        return self.__batch.addLine(coords, color)
+
+    def setChartVisible(self, traj: Trajectory, isOn: bool = True):
+        """
+        Показываем или прячем график, его точки остаются в видеокарте
+        """
+        view = self.plots[traj]
+        view["plot"].setVisible(isOn)
+        if view["envelope"] is not None:
+            view["envelope"].setVisible(isOn)
+
+    def setChartColor(self, traj: Trajectory, color):
+        """
+        Меняем цвет графика: строка pyqtgraph, QColor или (r, g, b, a) от 0 до 1
+        """
+        self.plots[traj]["plot"].setData(color=color)
+
+    def showEnsemble(self, stats: EnsembleStats, color=(0, 0.4, 1, 0.25),
+                     sides: int = 12, meshPoints: int = 4000) -> Trajectory:
+        """
+        Рисуем статистику набора траекторий от ensembleStats:
+        среднюю траекторию линией и трубку перцентилей
+        одной полупрозрачной сеткой треугольников.
+        В трубке не больше meshPoints колец, перцентили соседних точек
+        сетки времени объединяются, чтобы трубка не стала уже.
+        Возвращает среднюю траекторию, ей можно спрятать график
+        """
+        # Границы частей сетки времени, по одному кольцу на часть
+        step = max(1, -(-len(stats) // meshPoints))
+        starts = np.arange(0, len(stats), step)
+        low = np.minimum.reduceat(stats.low, starts)
+        high = np.maximum.reduceat(stats.high, starts)
+        vertexes, faces = tubeMesh(low, high, sides)
+        mesh = gl.GLMeshItem(vertexes=vertexes, faces=faces, color=color,
+                             smooth=False, drawEdges=False, glOptions="translucent")
+        self.addItem(mesh)
+
+        traj = stats.meanTrajectory(self.dtype)
+        self.showCharts([traj])
+        self.plots[traj]["envelope"] = mesh
+        return traj
+
+    def follow(self, data_file: str, interval: int = 500):
+        """
+        Режим слежения за файлом, который дописывается во время расчёта.
+        Раз в interval мс считываются только новые строки файла
+        """
+        self.unfollow()
+
+        with open(data_file, "rb") as f:
+            chart = readHeader(f)
+            offset = f.tell()
+        try:
+            check3D(chart)
+        except ChartTypeError as e:
+            self.__showError(str(e))
+            return
+
+        buffer = CoordsBuffer(dtype=self.dtype)
+        traj = Trajectory(chart["name"], chart["axis"], dtype=self.dtype)
+        self.graphs.append(traj)
+
+        for ax in "xyz":
+            self.addLabel(ax, traj.label(ax))
+
+        self.__follow = {"file": data_file,
+                         # До какого байта файл уже прочитан
+                         "offset": offset,
+                         # Начало блока координат, на случай перезаписи файла
+                         "start": offset,
+                         "trajectory": traj,
+                         "buffer": buffer}
+        self.__followUpdate()
+        # Слежение могло закончиться на первом же чтении
+        if self.__follow:
+            self.__followTimer.start(interval)
+
+    def unfollow(self):
+        """
+        Выключаем режим слежения за файлом, считанные точки остаются
+        """
+        self.__followTimer.stop()
+        self.__follow = {}
+
+    def __followUpdate(self):
+        fw = self.__follow
+        if not fw:
+            return
+
+        buffer: CoordsBuffer = fw["buffer"]
+        try:
+            size = os.path.getsize(fw["file"])
+            # Файл перезаписали заново - начинаем читать сначала
+            if size < fw["offset"]:
+                fw["offset"] = fw["start"]
+                buffer.clear()
+            with open(fw["file"], "rb") as f:
+                f.seek(fw["offset"])
+                text = f.read()
+        except OSError:
+            return
+
+        isFinish = False
+        end = findPointsBlock(b"\n" + text)
+        if end >= 0:
+            # Блок координат закончился, дальше следить не нужно
+            text = text[:end]
+            isFinish = True
+        else:
+            # Последняя строка может быть ещё не дописана
+            text = text[:text.rfind(b"\n") + 1]
+        fw["offset"] += len(text)
+
+        times, coords = parseCoords(text)
+        if len(times):
+            self.__followAppend(times, coords)
+
+        if isFinish:
+            self.unfollow()
+
+    def __followAppend(self, times, coords):
+        fw = self.__follow
+        traj: Trajectory = fw["trajectory"]
+        buffer: CoordsBuffer = fw["buffer"]
+        isFirst = buffer.size == 0
+
+        # Расширяем куб графика новыми точками
+        p1 = coords.min(0)
+        p2 = coords.max(0)
+        if not isFirst:
+            p1 = np.minimum(p1, traj.min)
+            p2 = np.maximum(p2, traj.max)
+
+        buffer.append(times, coords)
+        traj.setPoints(buffer.times, buffer.coords, bounds=(p1, p2))
+
+        view = self.plots.get(traj)
+        if view is None:
+            plt = LineItem(
+                pos=traj.coords, color=pg.mkColor('b'), width=1, antialias=True)
+            self.addItem(plt)
+            # Файл растёт, пирамиду детализации для него не строим
+            self.plots[traj] = {"plot": plt, "lod": None, "lodLevel": 0,
+                                "window": None, "mapped": None, "detail": None,
+                                "envelope": None}
+        elif isFirst:
+            # Файл перезаписали, линия строится заново
+            view["plot"].setData(pos=traj.coords)
+        else:
+            # В видеокарту передаются только новые точки
+            view["plot"].append(traj.coords[-len(coords):])
+        if self.timeWindow is not None:
+            self.__updateTimeWindow(traj)
+
+        # Сетку и подписи перестраиваем, только если график вышел за сетку
+        isGrow = False
+        for i, ax in enumerate("xyz"):
+            if traj.min[i] < self.axis[ax]["min"] or traj.max[i] > self.axis[ax]["max"]:
+                isGrow = True
+        if isGrow:
+            self.recalcAxis()
+            self.paintGrid()
+            for ax in "xyz":
+                self.recalcValuesAxis(ax)
+                self.paintAxis(ax)
+
+    def __showError(self, text: str):
+        msg_box = QtWidgets.QMessageBox()
+        msg_box.setWindowTitle("Ошибка")
+        msg_box.setText(text)
+        msg_box.exec()
+
+    def __parseData(self, data_file: str):
+        if self.cache is not None:
+            chart = self.cache.load(data_file)
+        else:
+            chart = loadChart(data_file)
+        try:
+            return check3D(chart)
+        except ChartTypeError as e:
+            # Разбор файла не знает об окнах, ошибку показываем здесь
+            self.__showError(str(e))
+            return None
+
+    def addLabel(self, ax, text, isForce=False):
+        isFind = False
+        # Настройки подписей для оси ax
+        label = self.axis[ax]["label"]
+        for tObj in label["mas"]:
+            if tObj.text == text:
+                isFind = True
+        if (not isFind) or isForce:
+            self.invalidateAxisLayout()
+            size = label["size"]
+            tObj = Text3DItem(text, size=size)
+            self.addItem(tObj)
+            label["mas"].append(tObj)
+            if label["atlas"] is not None:
+                # Название рисуется общим объектом оси
+                tObj.hide()
+                label["atlas"].setLabels(label["mas"])
+            # Перерисовые подписи оси
+            self.paintAxis(ax)
+
+    def recalcValuesAxis(self, ax):
+        # Тексты подписей меняются, сохранённые положения не годятся
+        self.invalidateAxisLayout()
+        # Обновляем значения делений осей
+        axi = self.axis[ax]
+        value = axi["value"]
+        # Все созданные подписи делений, лишние из них скрыты
+        pool = value["pool"]
+        # Тексты делений, первое значение будет минимумом
+        texts = tickTexts(axi["min"], axi["size"], axi["space"])
+        target_cnt = len(texts)
+        # Получаем размер текста меток
+        size = value["size"]
+        for i, text in enumerate(texts):
+            if i < len(pool):
+                # Используем уже созданную подпись,
+                # текст перерисовываем только если он поменялся
+                axiVal = pool[i]
+                if axiVal.text != text:
+                    axiVal.setText(text)
+            else:
+                # создаём подпись деления
+                axiVal = TextLabel(text, size=size)
+                # Добавляем в массив для отслеживания
+                pool.append(axiVal)
+        # Видимые подписи делений, лишние остаются в пуле
+        value["mas"] = pool[:target_cnt]
+        # Все видимые подписи рисуются одной текстурой
+        value["atlas"].setLabels(value["mas"])
+
+    def readCutQImage(self) -> QtGui.QImage | None:
+        """
+        Считываем обрезанное изображение с виджета
+        Пустое место залитое цветм фона обрезается
+        """
+        img = self.readQImage()
+        bg_color = QtGui.QColor.fromRgbF(*self.opts['bgcolor'])
+        return cropQImage(img, bg_color)
+
+    def keyPressEvent(self, event: QtGui.QKeyEvent):
+        super().keyPressEvent(event)
+
+        # Если нажали Ctrl + C
+        if event.key() == QtCore.Qt.Key_C and event.modifiers() == QtCore.Qt.ControlModifier:  # type: ignore
+            # Если получится копируем изображение в буфер обмена
+            img = self.readCutQImage()
+            if img:
+                QtWidgets.QApplication.clipboard().setImage(img)
+
+    def goDefView(self):
+        # Верхняя точка куба сетки
+        pos = {ax: self.axis[ax]["amax"] for ax in "xyz"}
+        # Отдаляем камеру чуть дальше
+        for ax in "xyz":
+            pos[ax] *= 1.8
+
+        azi = 0
+        if pos["x"] != 0:
+            azi = np.arctan(pos["y"]/pos["x"])
+            if pos["y"] == 0:
+                if pos["x"] < 0:
+                    azi = np.pi
+        else:
+            azi = np.pi / 2
+            if pos["y"] <= 0:
+                azi *= -1
+
+        elv = 0
+        distXY = (pos["x"]**2 + pos["y"]**2) ** 0.5
+        if distXY != 0:
+            elv = np.arctan(pos["z"]/distXY)
+        else:
+            if pos["z"] < 0:
+                elv = np.pi
+
+        dist = (pos["x"]**2 + pos["y"]**2 + pos["z"]**2) ** 0.5
+
+        # Приводим углы в градусы
+        azi = np.rad2deg(azi)
+        elv = np.rad2deg(elv)
+
+        center = QtGui.QVector3D(0, 0, 0)
+        self.setCameraPosition(
+            pos=center,
+            elevation=0,
+            azimuth=0,
+            distance=0)
+        self.setCameraPosition(
+            elevation=elv,
+            azimuth=azi,
+            distance=dist)
+
+        self.paintGridByDirection()
+
+
+class Menu3DLayout(QtWidgets.QVBoxLayout):
+    def __init__(self, graph: Graph3DWidjet, *args, **kargs):
+        super().__init__(*args, **kargs)
+
+        self.graph = graph
+
+        self.setAlignment(QtCore.Qt.AlignTop)  # type: ignore
+
+        buttonAddGraph = QtWidgets.QPushButton(text="Добавить График")
+        buttonAddGraph.clicked.connect(self.loadChart)
+        self.addWidget(buttonAddGraph)
+
+        # Прогресс фоновой загрузки графика
+        self.loader = None
+        self.progressLoad = QtWidgets.QProgressBar()
+        self.progressLoad.setRange(0, 1000)
+        self.progressLoad.hide()
+        self.addWidget(self.progressLoad)
+
+        self.buttonCancelLoad = QtWidgets.QPushButton(text="Отменить загрузку")
+        self.buttonCancelLoad.clicked.connect(self.cancelLoad)
+        self.buttonCancelLoad.hide()
+        self.addWidget(self.buttonCancelLoad)
+
+        buttonCamera = QtWidgets.QPushButton(text="Вид по умолчанию")
+        buttonCamera.clicked.connect(self.onDefPosClick)
+        self.addWidget(buttonCamera)
+
+        checkFrames = QtWidgets.QCheckBox(text="Время кадра")
+        checkFrames.toggled.connect(self.graph.setFrameOverlay)
+        self.addWidget(checkFrames)
+
+        testButton = QtWidgets.QPushButton(text="Тест")
+        testButton.clicked.connect(self.onTestButton)
+        self.addWidget(testButton)
+
+        spacer = QtWidgets.QSpacerItem(
+            0, 0, QtWidgets.QSizePolicy.Expanding, QtWidgets.QSizePolicy.Expanding)  # type: ignore
+        self.addSpacerItem(spacer)
+
+        buttonSave = QtWidgets.QPushButton(text="save")
+        buttonSave.clicked.connect(self.saveChart)
+        self.addWidget(buttonSave)
+
+        buttonClean = QtWidgets.QPushButton(text="clean")
+        buttonClean.clicked.connect(self.cleanChart)
+        self.addWidget(buttonClean)
+
+    @Slot()
+    def saveChart(self):
+        img = self.graph.readCutQImage()
+        if img:
+            fileName = QtWidgets.QFileDialog.getSaveFileName(
+                None, "Save File", "test.png", "Images (*.png *.jpg)")[0]  # type: ignore
+            if fileName:
+                img.save(fileName)
+        else:
+            msg_box = QtWidgets.QMessageBox()
+            msg_box.setWindowTitle("Ошибка")
+            msg_box.setText("На графике ничего нет")
+            msg_box.exec()
+
+    @Slot()
+    def loadChart(self):
+        dialog = QtWidgets.QFileDialog(
+            parent=None,
+            caption="Выберете файл расчёта",
+            directory=os.path.abspath("."))
+        dialog.setFileMode(QtWidgets.QFileDialog.AnyFile)  # type: ignore
+        dialog.setViewMode(QtWidgets.QFileDialog.Detail)  # type: ignore
+        if dialog.exec():
+            data_file = dialog.selectedFiles()[0]
+            self.cancelLoad()
+            self.loader = self.graph.addChartAsync(data_file)
+            self.__connectLoader(self.loader, True)
+
+            self.progressLoad.setValue(0)
+            self.progressLoad.setFormat("")
+            self.progressLoad.show()
+            self.buttonCancelLoad.show()
+            self.parentWidget().setWindowTitle(data_file)
+
+    @Slot(object, object)
+    def onLoadProgress(self, read, total):
+        mb = 1024 * 1024
+        self.progressLoad.setValue(round(1000 * read / total) if total else 1000)
+        self.progressLoad.setFormat(f"{read / mb:.1f} / {total / mb:.1f} МБ")
+
+    @Slot()
+    def onLoadFinished(self):
+        self.loader = None
+        self.progressLoad.hide()
+        self.buttonCancelLoad.hide()
+
+    @Slot()
+    def cancelLoad(self):
+        if self.loader:
+            self.loader.cancel()
+            # Сигналы отменённого загрузчика не должны трогать следующую загрузку
+            self.__connectLoader(self.loader, False)
+            self.onLoadFinished()
+
+    def __connectLoader(self, loader: ChartLoader, isOn: bool):
+        signals = loader.signals
+        for sig, slot in ((signals.progress, self.onLoadProgress),
+                          (signals.finished, self.onLoadFinished),
+                          (signals.failed, self.onLoadFinished),
+                          (signals.canceled, self.onLoadFinished)):
+            if isOn:
+                sig.connect(slot)
+            else:
+                sig.disconnect(slot)
+
+    @Slot()
+    def onDefPosClick(self):
+        self.graph.goDefView()
+
+    @Slot()
+    def onTestButton(self):
+        self.graph.paintAxis("y")
+
+    @Slot()
+    def cleanChart(self):
+        self.graph.Clean()
+
+
+class TimeLayout(QtWidgets.QHBoxLayout):
+    """
+    Управление временем под графиком: ползунок конца окна времени,
+    длина окна и воспроизведение полёта
+    """
+
+    # Шагов ползунка на весь полёт
+    STEPS = 1000
+    # Скорости воспроизведения
+    SPEEDS = (1, 2, 5, 10, 50, 100)
+
+    def __init__(self, graph: Graph3DWidjet, *args, **kargs):
+        super().__init__(*args, **kargs)
+
+        self.graph = graph
+
+        self.buttonPlay = QtWidgets.QPushButton(text="Пуск")
+        self.buttonPlay.clicked.connect(self.onPlayClick)
+        self.addWidget(self.buttonPlay)
+
+        self.comboSpeed = QtWidgets.QComboBox()
+        for speed in self.SPEEDS:
+            self.comboSpeed.addItem(f"{speed}×", speed)
+        self.comboSpeed.currentIndexChanged.connect(self.onSpeedChanged)
+        self.addWidget(self.comboSpeed)
+
+        self.slider = QtWidgets.QSlider(QtCore.Qt.Horizontal)  # type: ignore
+        self.slider.setRange(0, self.STEPS)
+        self.slider.setValue(self.STEPS)
+        self.slider.valueChanged.connect(self.onSliderMoved)
+        self.addWidget(self.slider, 1)
+
+        # Длина окна времени, 0 - от начала полёта
+        self.spinWindow = QtWidgets.QDoubleSpinBox()
+        self.spinWindow.setRange(0, 1e9)
+        self.spinWindow.setDecimals(1)
+        self.spinWindow.setPrefix("окно ")
+        self.spinWindow.setSuffix(" с")
+        self.spinWindow.setSpecialValueText("с начала")
+        self.spinWindow.valueChanged.connect(self.onSliderMoved)
+        self.addWidget(self.spinWindow)
+
+        self.labelTime = QtWidgets.QLabel()
+        self.addWidget(self.labelTime)
+
+        buttonAll = QtWidgets.QPushButton(text="Весь полёт")
+        buttonAll.clicked.connect(self.onAllClick)
+        self.addWidget(buttonAll)
+
+        self.graph.timeWindowChanged.connect(self.onWindowChanged)
+
+    def windowWidth(self) -> float | None:
+        return self.spinWindow.value() or None
+
+    @Slot()
+    def onSliderMoved(self):
+        rng = self.graph.timeRange()
+        if rng is None:
+            return
+        t1 = rng[0] + (rng[1] - rng[0]) * self.slider.value() / self.STEPS
+        width = self.windowWidth()
+        t0 = rng[0] if width is None else max(rng[0], t1 - width)
+        self.graph.setTimeWindow(t0, t1)
+
+    @Slot(float, float)
+    def onWindowChanged(self, t0, t1):
+        rng = self.graph.timeRange()
+        if rng is not None and rng[1] > rng[0]:
+            # Ползунок двигаем без обратного вызова onSliderMoved
+            self.slider.blockSignals(True)
+            self.slider.setValue(round(self.STEPS * (t1 - rng[0]) / (rng[1] - rng[0])))
+            self.slider.blockSignals(False)
+        self.labelTime.setText(f"t = {t0:.1f}..{t1:.1f} с")
+        if not self.graph.isPlaying():
+            self.buttonPlay.setText("Пуск")
+
+    @Slot()
+    def onPlayClick(self):
+        if self.graph.isPlaying():
+            self.graph.pause()
+            self.buttonPlay.setText("Пуск")
+        else:
+            self.graph.play(self.comboSpeed.currentData(), self.windowWidth())
+            if self.graph.isPlaying():
+                self.buttonPlay.setText("Пауза")
+
+    @Slot()
+    def onSpeedChanged(self):
+        self.graph.setPlaySpeed(self.comboSpeed.currentData())
+
+    @Slot()
+    def onAllClick(self):
+        self.graph.clearTimeWindow()
+
+
+class Graph3DWindow(QtWidgets.QWidget):
+    def __init__(self, data_file: str = "", *args, **kargs):
+        super().__init__(*args, **kargs)
+
+        # названия файла с данными для графика
+        self.data_file = data_file
+        # Получаем окно 3d графика
+        self.graph = Graph3DWidjet(data_file)
+
+        # Задаём лаяут по умолчанию
+        self.__layout = QtWidgets.QHBoxLayout(self)
+        # Добавим туда сам график, а под ним управление временем
+        self.__graphLayout = QtWidgets.QVBoxLayout()
+        self.__graphLayout.addWidget(self.graph, 1)
+        self.timeLayout = TimeLayout(self.graph)
+        self.__graphLayout.addLayout(self.timeLayout)
+        self.__layout.addLayout(self.__graphLayout, 1)
+        self.menu = Menu3DLayout(self.graph)
+        # Добавим туда меню для графика
+        self.__layout.addLayout(self.menu)
+        # Приклеиваем компоненты к верху виджета
+        self.__layout.setAlignment(QtCore.Qt.AlignTop)  # type: ignore
+
+        # Задаём заголовок виджета
+        self.setWindowTitle(data_file)
\ No newline at end of file
@@ -0,0 +1,192 @@
+"""
+Расчёт сетки, делений и положения подписей осей без объектов OpenGL.
+
+Подписи размещаются так же, как это делали методы
+translate/rotate у Text3DItem, но матрицы всех подписей оси
+считаются сразу массивами numpy (N, 4, 4).
+Матрицы записаны по строкам, как у QMatrix4x4(copyDataTo()).
+Оси надписи: строки картинки идут по x, столбцы по y
+"""
+import math
+import numpy as np
+
+
+def gridBounds(lo: float, hi: float, space: float) -> dict:
+    """
+    Сетка по одной оси для точек от lo до hi.
+    Сетка всегда проходит через 0, а её края округляются
+    наружу до шага space.
+    amin и amax - края, ближний и дальний от 0,
+    direction - с какой стороны от 0 лежит ближний край
+    """
+    bounds = {}
+    for mod, val in (("min", min(lo, 0)), ("max", max(hi, 0))):
+        sign = 1 if val >= 0 else -1
+        bounds[mod] = sign * math.ceil(abs(val) / space) * space
+    vmin, vmax = bounds["min"], bounds["max"]
+    bounds["size"] = vmax - vmin
+    bounds["delta"] = (vmax + vmin) / 2
+    bounds["amax"] = max(vmax, vmin, key=lambda x: abs(x))
+    bounds["amin"] = min(vmax, vmin, key=lambda x: abs(x))
+    bounds["direction"] = -1 if bounds["amin"] == vmax else 1
+    return bounds
+
+
+def tickTexts(vmin: float, size: float, space: float) -> list:
+    """
+    Тексты делений оси от vmin через space на длине size,
+    значения до 2 знаков после запятой
+    """
+    count = int(size // space) + 1
+    return [str(round(vmin + i * space, 2)) for i in range(count)]
+
+
+def translation(d: np.ndarray) -> np.ndarray:
+    """
+    Матрицы переноса на векторы d (N, 3)
+    """
+    d = np.asarray(d, dtype=np.float64).reshape(-1, 3)
+    mats = np.zeros((len(d), 4, 4))
+    mats[:, [0, 1, 2, 3], [0, 1, 2, 3]] = 1
+    mats[:, :3, 3] = d
+    return mats
+
+
+def rotation(angle: float, axis) -> np.ndarray:
+    """
+    Матрица поворота на angle градусов вокруг оси axis,
+    как у QMatrix4x4.rotate
+    """
+    x, y, z = np.asarray(axis, dtype=np.float64) / np.linalg.norm(axis)
+    a = np.radians(angle)
+    c, s = np.cos(a), np.sin(a)
+    # Прямые углы считаем точно, как это делает Qt
+    if angle % 90 == 0:
+        c, s = round(c), round(s)
+    t = 1 - c
+    mat = np.eye(4)
+    mat[:3, :3] = [[t*x*x + c, t*x*y - s*z, t*x*z + s*y],
+                   [t*x*y + s*z, t*y*y + c, t*y*z - s*x],
+                   [t*x*z - s*y, t*y*z + s*x, t*z*z + c]]
+    return mat
+
+
+def textTranslation(dx, dy, dz) -> np.ndarray:
+    """
+    Перенос в осях текста, как у TextBase.myTranslate
+    """
+    dx, dy, dz = np.broadcast_arrays(dx, dy, dz)
+    return translation(np.stack([-dy, dx, dz], axis=-1))
+
+
+def textRotation(angle: float, axi: str, heights: np.ndarray,
+                 widths: np.ndarray) -> np.ndarray:
+    """
+    Поворот надписей вокруг их центров, как у TextBase.myRotate
+    """
+    r = {"x": (0, 1, 0), "y": (1, 0, 0), "z": (0, 0, 1)}[axi]
+    center = np.stack([heights / 2, widths / 2, np.zeros_like(heights)], axis=-1)
+    return translation(center) @ rotation(angle, r) @ translation(-center)
+
+
+def resetTransforms(heights: np.ndarray, widths: np.ndarray) -> np.ndarray:
+    """
+    Начальное положение надписей, как у TextBase.resetTransform
+    """
+    center = np.stack([heights / 2, widths / 2, np.zeros_like(heights)], axis=-1)
+    return translation(-center) @ textRotation(-90, "z", heights, widths)
+
+
+def _edge(axi: dict, isMax: bool) -> float:
+    # Край сетки по оси с учётом её направления
+    if (axi["direction"] < 0) == isMax:
+        return axi["min"]
+    return axi["max"]
+
+
+def _place(heights, widths, point, rotations, shift) -> np.ndarray:
+    """
+    Общая схема размещения: начальное положение, перенос в точку оси,
+    повороты (угол, ось) и сдвиг каждой надписи shift (N, 3)
+    в осях текста
+    """
+    mats = resetTransforms(heights, widths) @ textTranslation(*point)
+    for angle, axi in rotations:
+        if angle:
+            mats = mats @ textRotation(angle, axi, heights, widths)
+    return mats @ textTranslation(shift[:, 0], shift[:, 1], shift[:, 2])
+
+
+def valueTransforms(axis: dict, ax: str, heights, widths) -> np.ndarray:
+    """
+    Матрицы подписей делений оси ax.
+    axis - словарь осей виджета, heights и widths - размеры картинок подписей
+    """
+    heights = np.asarray(heights, dtype=np.float64)
+    widths = np.asarray(widths, dtype=np.float64)
+    n = len(heights)
+    if not n:
+        return np.zeros((0, 4, 4))
+    x, y, z = axis["x"], axis["y"], axis["z"]
+    xd, yd, zd = x["direction"], y["direction"], z["direction"]
+    value = axis[ax]["value"]
+
+    # Отступ от края плоскости до центра надписи
+    indent = value["offset"] + widths / 2
+    # Шаг между делениями
+    steps = np.arange(n) * axis[ax]["space"]
+    shift = np.zeros((n, 3))
+    if ax == "x":
+        point = (x["min"], _edge(y, True), _edge(z, False))
+        rotations = ((90 * xd, "z"), (180 if zd < 0 else 0, "x"))
+        shift[:, 0] = xd * yd * indent
+        shift[:, 1] = -xd * zd * steps
+    elif ax == "y":
+        point = (_edge(x, True), y["min"], _edge(z, False))
+        rotations = ((180 if yd > 0 else 0, "z"), (180 if zd < 0 else 0, "x"))
+        shift[:, 0] = -xd * yd * indent
+        shift[:, 1] = -yd * zd * steps
+        # Крайнюю метку сдвигаем, чтобы она не пересекалась с плоскостью
+        shift[0 if yd > 0 else -1, 1] += -zd * heights[-1] / 2
+    else:
+        point = (_edge(x, True), _edge(y, False), z["min"])
+        rotations = ((180 if yd > 0 else 0, "z"), (90, "x"))
+        shift[:, 0] = -xd * yd * indent
+        shift[:, 1] = steps
+        shift[0 if zd > 0 else -1, 1] += zd * heights[-1] / 2
+    return _place(heights, widths, point, rotations, shift)
+
+
+def labelTransforms(axis: dict, ax: str, heights, widths) -> np.ndarray:
+    """
+    Матрицы названий оси ax, названия идут столбиком от края сетки.
+    axis - словарь осей виджета, heights и widths - размеры картинок названий
+    """
+    heights = np.asarray(heights, dtype=np.float64)
+    widths = np.asarray(widths, dtype=np.float64)
+    n = len(heights)
+    if not n:
+        return np.zeros((0, 4, 4))
+    x, y, z = axis["x"], axis["y"], axis["z"]
+    xd, yd, zd = x["direction"], y["direction"], z["direction"]
+    label = axis[ax]["label"]
+
+    # Расстояние от края сетки до центра каждого названия
+    dist = label["offset"] + np.cumsum(heights / 2)
+    if ax == "x":
+        point = (x["delta"], _edge(y, True), _edge(z, False))
+        rotations = ((180 if yd > 0 else 0, "z"), (180 if zd < 0 else 0, "x"))
+        dist += np.arange(n) * label["step"]
+    elif ax == "y":
+        point = (_edge(x, True), y["delta"], _edge(z, False))
+        rotations = ((90 * xd, "z"), (180 if zd < 0 else 0, "x"))
+        dist += (2 * np.arange(n) + 1) * label["step"]
+    else:
+        point = (_edge(x, True), _edge(y, False), z["delta"])
+        rotations = ((180 if yd > 0 else 0, "z"), (90, "x"),
+                     (-90 * xd * zd * yd, "z"))
+        dist += (2 * np.arange(n) + 1) * label["step"]
+
+    shift = np.zeros((n, 3))
+    shift[:, 1] = -zd * (heights / 2 + dist)
+    return _place(heights, widths, point, rotations, shift)
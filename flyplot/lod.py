@@ -0,0 +1,152 @@
+import numpy as np
+from .data import Trajectory
+from .timing import timed
+
+
+def decimate(coords: np.ndarray, factor: int = 8) -> np.ndarray:
+    """
+    Прореживание траектории корзинами по factor точек.
+    Из каждой корзины остаются первая точка и точки
+    с минимальной и максимальной высотой (z).
+    Первая и последняя точки траектории остаются всегда.
+    Возвращает индексы оставленных точек по возрастанию
+    """
+    n = len(coords)
+    nb = n // factor
+    if nb == 0:
+        return np.arange(n)
+
+    z = coords[:nb * factor, 2].reshape(nb, factor)
+    base = np.arange(nb) * factor
+
+    mask = np.zeros(n, dtype=bool)
+    mask[base] = True
+    mask[base + z.argmin(1)] = True
+    mask[base + z.argmax(1)] = True
+    # Хвост, не попавший в целую корзину, оставляем целиком
+    mask[nb * factor:] = True
+    mask[n - 1] = True
+    return np.flatnonzero(mask)
+
+
+class StreamDecimator:
+    """
+    Прореживание траектории, которая приходит частями, как decimate.
+    Неполная корзина в конце части переносится в следующую,
+    поэтому оставленные точки не зависят от того, как поток разбит на части,
+    и их примерно в factor / 3 раз меньше, чем точек в потоке
+    """
+
+    def __init__(self, factor: int = 8):
+        self.factor = factor
+        # Точки неполной корзины, ещё не прошедшие прореживание
+        self.__times = np.empty(0)
+        self.__coords = np.empty((0, 3))
+        # Последняя точка потока, если она ещё не оставлена
+        self.__last = None
+
+    def push(self, times: np.ndarray, coords: np.ndarray):
+        """
+        Добавляем часть траектории.
+        Возвращает оставленные точки (времена, координаты) из целых корзин
+        """
+        if len(self.__times):
+            times = np.concatenate([self.__times, times])
+            coords = np.concatenate([self.__coords, coords])
+        n = len(times)
+        nb = n // self.factor
+        size = nb * self.factor
+        # Хвост копируется, чтобы не держать в памяти всю часть
+        self.__times = times[size:].copy()
+        self.__coords = coords[size:].copy()
+        if not nb:
+            self.__last = None
+            return times[:0], coords[:0]
+
+        z = coords[:size, 2].reshape(nb, self.factor)
+        base = np.arange(nb) * self.factor
+        mask = np.zeros(size, dtype=bool)
+        mask[base] = True
+        mask[base + z.argmin(1)] = True
+        mask[base + z.argmax(1)] = True
+        keep = np.flatnonzero(mask)
+        self.__last = None
+        if size == n and not mask[-1]:
+            self.__last = (times[-1:].copy(), coords[-1:].copy())
+        return times[keep], coords[keep]
+
+    def finish(self):
+        """
+        Конец потока: неполная корзина прореживается так же,
+        а последняя точка потока остаётся всегда
+        """
+        times, coords = self.__times, self.__coords
+        self.__times = np.empty(0)
+        self.__coords = np.empty((0, 3))
+        if len(times):
+            keep = np.unique([0, coords[:, 2].argmin(), coords[:, 2].argmax(),
+                              len(times) - 1])
+            return times[keep], coords[keep]
+        last, self.__last = self.__last, None
+        if last is not None:
+            return last
+        return times, coords
+
+
+class LodPyramid:
+    """
+    Пирамида уровней детализации траектории.
+    Уровень 0 - исходные точки, каждый следующий
+    получается прореживанием предыдущего
+    """
+
+    def __init__(self, coords: np.ndarray, factor: int = 8, minPoints: int = 1000):
+        # Индексы точек уровня в исходном массиве.
+        # У уровня 0 индекс точки равен ей самой, массив не храним
+        self.indices = [None]
+        # Точки уровня, непрерывные массивы для отрисовки
+        self.coords = [coords]
+
+        while len(self.coords[-1]) > minPoints:
+            keep = decimate(self.coords[-1], factor)
+            if len(keep) >= len(self.coords[-1]):
+                break
+            prev = self.indices[-1]
+            self.indices.append(keep if prev is None else prev[keep])
+            self.coords.append(np.ascontiguousarray(self.coords[-1][keep]))
+
+        # Диагональ куба, вмещающего траекторию
+        if len(coords):
+            self.diagonal = float(np.linalg.norm(coords.max(0) - coords.min(0)))
+        else:
+            self.diagonal = 0.0
+
+    def __len__(self):
+        return len(self.coords)
+
+    def select(self, target: float) -> int:
+        """
+        Самый грубый уровень, в котором не меньше target точек
+        """
+        for level in range(len(self.coords) - 1, 0, -1):
+            if len(self.coords[level]) >= target:
+                return level
+        return 0
+
+
+@timed("prepareChart")
+def prepareChart(chart: dict, dtype=np.float32) -> dict:
+    """
+    Готовим словарь графика 3D от loadChart к выводу на экран:
+    в "trajectory" кладётся траектория с координатами dtype,
+    в "lod" - её пирамида детализации, а исходные массивы
+    "times" и "coords" убираются.
+    Вызывается в потоке или процессе загрузки, чтобы поток интерфейса
+    только создавал объекты OpenGL
+    """
+    traj = Trajectory.fromChart(chart, dtype)
+    chart["trajectory"] = traj
+    chart["lod"] = LodPyramid(traj.coords)
+    chart.pop("times", None)
+    chart.pop("coords", None)
+    return chart
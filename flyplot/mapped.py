@@ -0,0 +1,184 @@
+import os
+import mmap
+import numpy as np
+from .data import readHeader, findPointsBlock, parseCoords, Trajectory, BLOCK_SIZE
+from .lod import StreamDecimator
+
+
+class MappedTrajectory:
+    """
+    Траектория из файла, который может не помещаться в память.
+    Файл открывается через mmap и читается один раз по частям:
+    запоминается разреженный индекс (смещение в байтах и время
+    первой точки для каждых step строк) и прореженный обзор траектории
+    примерно из overviewPoints точек.
+    Точные точки окна времени разбираются из mmap по запросу,
+    поэтому память не зависит от размера файла
+    """
+
+    def __init__(self, data_file: str, step: int = 4096,
+                 overviewPoints: int = 500_000, progress=None,
+                 blockSize: int = BLOCK_SIZE):
+        self.data_file = data_file
+        self.step = step
+        self.__mm = None
+        self.__file = open(data_file, "rb")
+        try:
+            self.__open(overviewPoints, progress, blockSize)
+        except BaseException:
+            # Ошибка разбора или отмена загрузки: файл не должен остаться открытым
+            self.close()
+            raise
+
+    def __open(self, overviewPoints: int, progress, blockSize: int):
+        self.header = readHeader(self.__file)
+        self.type = self.header["type"]
+        self.name = self.header["name"]
+        self.axis = self.header.get("axis", {})
+
+        # Индекс частей файла по step строк:
+        # начало части в байтах, время первой точки и число точек
+        self.offsets = np.zeros(1, dtype=np.int64)
+        self.times = np.empty(0)
+        self.counts = np.zeros(0, dtype=np.int64)
+        self.overview: Trajectory | None = None
+        self.min = np.zeros(3)
+        self.max = np.zeros(3)
+        if self.type != "3D":
+            self.close()
+            return
+
+        # Блок координат: от конца заголовка до блока points или конца файла
+        self.start = self.end = self.__file.tell()
+        if os.fstat(self.__file.fileno()).st_size > self.start:
+            self.__mm = mmap.mmap(self.__file.fileno(), 0, access=mmap.ACCESS_READ)
+            self.end = len(self.__mm)
+        self.__index(overviewPoints, progress, blockSize)
+
+    def __index(self, overviewPoints: int, progress, blockSize: int):
+        offsets = []
+        times = []
+        counts = []
+        ovTimes = []
+        ovCoords = []
+        p1 = np.full(3, np.inf)
+        p2 = np.full(3, -np.inf)
+        # Во сколько раз прореживать обзор, узнаём по первой части файла.
+        # Корзины прореживания идут сквозь границы частей,
+        # иначе от каждой части оставался бы её неполный хвост
+        decimator = None
+
+        pos = self.start
+        while pos < self.end:
+            blockEnd = min(pos + blockSize, self.end)
+            text = self.__mm[pos:blockEnd]
+            if blockEnd < self.end:
+                # Разбираем только целые строки
+                text = text[:text.rfind(b"\n") + 1] or text
+            cut = findPointsBlock(b"\n" + text)
+            if cut >= 0:
+                # Дальше идёт блок points, на нём файл заканчивается
+                text = text[:cut]
+                self.end = pos + len(text)
+            # Делим часть файла на куски по step строк
+            lines = np.flatnonzero(np.frombuffer(text, dtype=np.uint8) == 10) + 1
+            cuts = [0] + lines[self.step - 1::self.step].tolist()
+            if cuts[-1] != len(text):
+                cuts.append(len(text))
+
+            for a, b in zip(cuts[:-1], cuts[1:]):
+                t, c = parseCoords(text[a:b])
+                if not len(t):
+                    continue
+                if decimator is None:
+                    # Оценка числа точек в файле по плотности первой части,
+                    # чтобы обзор получился примерно из overviewPoints точек
+                    total = len(t) * (self.end - self.start) / (b - a)
+                    factor = max(1, int(np.ceil(3 * total / overviewPoints)))
+                    decimator = StreamDecimator(factor)
+                offsets.append(pos + a)
+                times.append(t[0])
+                counts.append(len(t))
+                np.minimum(p1, c.min(0), out=p1)
+                np.maximum(p2, c.max(0), out=p2)
+                t, c = decimator.push(t, c)
+                ovTimes.append(t)
+                ovCoords.append(c)
+
+            pos += len(text)
+            if progress is not None:
+                progress(pos, self.end)
+            if cut >= 0:
+                break
+
+        offsets.append(self.end)
+        self.offsets = np.array(offsets, dtype=np.int64)
+        self.times = np.array(times)
+        self.counts = np.array(counts, dtype=np.int64)
+        if counts:
+            self.min, self.max = p1, p2
+            t, c = decimator.finish()
+            ovTimes.append(t)
+            ovCoords.append(c)
+            ovTimes = np.concatenate(ovTimes)
+            ovCoords = np.concatenate(ovCoords)
+        else:
+            ovTimes, ovCoords = np.empty(0), np.empty((0, 3))
+        self.overview = Trajectory(self.name, self.axis, ovTimes, ovCoords,
+                                   np.float32)
+        # Крайние точки обзора берём точные, по всем точкам файла
+        self.overview.setPoints(self.overview.times, self.overview.coords,
+                                bounds=(self.min, self.max))
+
+    def __len__(self):
+        return int(self.counts.sum())
+
+    def window(self, t0: float, t1: float, maxPoints: int | None = None,
+               dtype=np.float32, blockSize: int = BLOCK_SIZE) -> Trajectory:
+        """
+        Точные точки со временем от t0 до t1, разобранные из файла.
+        Если точек больше maxPoints, они прореживаются так же, как обзор
+        """
+        empty = Trajectory(self.name, self.axis, dtype=dtype)
+        if self.__mm is None or not len(self.times):
+            return empty
+        # Части файла, в которые попадает окно
+        i = max(int(np.searchsorted(self.times, t0, "right")) - 1, 0)
+        j = int(np.searchsorted(self.times, t1, "right"))
+        if j <= i:
+            return empty
+
+        decimator = None
+        total = int(self.counts[i:j].sum())
+        if maxPoints is not None and total > maxPoints:
+            decimator = StreamDecimator(int(np.ceil(3 * total / maxPoints)))
+
+        partTimes = []
+        partCoords = []
+        k = i
+        while k < j:
+            # Соседние части разбираем вместе, но не больше blockSize байт
+            m = int(np.searchsorted(self.offsets, self.offsets[k] + blockSize, "right")) - 1
+            m = min(max(m, k + 1), j)
+            t, c = parseCoords(self.__mm[self.offsets[k]:self.offsets[m]])
+            mask = (t >= t0) & (t <= t1)
+            t, c = t[mask], c[mask]
+            if decimator is not None:
+                t, c = decimator.push(t, c)
+            partTimes.append(t)
+            partCoords.append(c.astype(dtype))
+            k = m
+        if decimator is not None:
+            t, c = decimator.finish()
+            partTimes.append(t)
+            partCoords.append(c.astype(dtype))
+
+        return Trajectory(self.name, self.axis,
+                          np.concatenate(partTimes), np.concatenate(partCoords),
+                          dtype)
+
+    def close(self):
+        if self.__mm is not None:
+            self.__mm.close()
+            self.__mm = None
+        self.__file.close()
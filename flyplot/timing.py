@@ -0,0 +1,89 @@
+import os
+import time
+import functools
+import threading
+
+
+class Timings:
+    """
+    Замеры времени этапов работы графика: загрузка, разбор,
+    пересчёт осей, растеризация текста, отрисовка кадра.
+    Для каждого этапа копятся число вызовов и длительности.
+    Пока замеры выключены, обёртка timed только проверяет флаг enabled.
+    Включить замеры при запуске можно переменной окружения FLYPLOT_TIMINGS=1
+    """
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        # Этап -> {"count", "total", "min", "max", "last"}, время в секундах
+        self.stages = {}
+        # Функции listener(этап, секунды), вызываются после каждого замера
+        self.listeners = []
+        # Загрузка файлов замеряется и в потоках загрузчиков
+        self.__lock = threading.Lock()
+
+    def enable(self, isOn: bool = True):
+        self.enabled = isOn
+
+    def record(self, stage: str, seconds: float):
+        with self.__lock:
+            st = self.stages.get(stage)
+            if st is None:
+                st = self.stages[stage] = {"count": 0, "total": 0.0,
+                                           "min": seconds, "max": seconds,
+                                           "last": seconds}
+            st["count"] += 1
+            st["total"] += seconds
+            st["last"] = seconds
+            if seconds < st["min"]:
+                st["min"] = seconds
+            if seconds > st["max"]:
+                st["max"] = seconds
+        for listener in self.listeners:
+            listener(stage, seconds)
+
+    def timed(self, stage: str):
+        """
+        Декоратор: время каждого вызова функции записывается в этап stage
+        """
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kargs):
+                if not self.enabled:
+                    return func(*args, **kargs)
+                t = time.perf_counter()
+                try:
+                    return func(*args, **kargs)
+                finally:
+                    self.record(stage, time.perf_counter() - t)
+            return wrapper
+        return decorator
+
+    def stats(self) -> dict:
+        """
+        Копия накопленных замеров со средним временем этапов
+        """
+        stats = {}
+        for stage, st in self.stages.items():
+            stats[stage] = dict(st, mean=st["total"] / st["count"])
+        return stats
+
+    def reset(self):
+        self.stages = {}
+
+    def report(self) -> str:
+        """
+        Таблица замеров, этапы по убыванию общего времени
+        """
+        lines = [f"{'этап':<16} {'вызовов':>8} {'всего, мс':>11} "
+                 f"{'среднее, мс':>12} {'макс, мс':>10}"]
+        stats = sorted(self.stats().items(), key=lambda s: -s[1]["total"])
+        for stage, st in stats:
+            lines.append(f"{stage:<16} {st['count']:>8} {st['total'] * 1000:>11.2f} "
+                         f"{st['mean'] * 1000:>12.3f} {st['max'] * 1000:>10.2f}")
+        return "\n".join(lines)
+
+
+# Общие замеры, в них пишут все графики процесса
+timings = Timings(os.environ.get("FLYPLOT_TIMINGS", "") not in ("", "0"))
+timed = timings.timed
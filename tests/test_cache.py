@@ -0,0 +1,105 @@
+import os
+import threading
+import numpy as np
+import pytest
+from flyplot.cache import ChartCache, defaultCacheDir
+from flyplot.data import loadChart
+
+HEADER = "name: Test\ntype: 3D\nx: North | m\ny: East | m\nz: Altitude | m\ncoords:\n"
+
+
+def writeChart(path, count: int, shift: float = 0.0):
+    with open(path, "w") as f:
+        f.write(HEADER)
+        for i in range(count):
+            f.write(f"{i * 0.1:.2f} -> {i + shift} {2 * i} {3 * i}\n")
+    return str(path)
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    monkeypatch.setenv("FLYPLOT_CACHE_DIR", str(tmp_path / "cache"))
+    return ChartCache()
+
+
+def test_default_dir_from_env(cache, tmp_path):
+    assert defaultCacheDir() == str(tmp_path / "cache")
+    assert cache.cacheDir == str(tmp_path / "cache")
+
+
+def test_miss_then_hit(cache, tmp_path):
+    path = writeChart(tmp_path / "a.txt", 50)
+    first = cache.load(path)
+    second = cache.load(path)
+    assert (cache.hits, cache.misses) == (1, 1)
+    # Из кэша массивы открываются через mmap
+    assert isinstance(second["times"], np.memmap)
+    expected = loadChart(path)
+    assert np.array_equal(second["times"], expected["times"])
+    assert np.array_equal(second["coords"], first["coords"])
+    assert second["axis"]["x"]["name"] == expected["axis"]["x"]["name"]
+    assert not [f for f in os.listdir(cache.cacheDir) if f.endswith(".tmp")]
+
+
+def test_invalidate_on_size_change(cache, tmp_path):
+    path = writeChart(tmp_path / "a.txt", 50)
+    cache.load(path)
+    writeChart(path, 60)
+    chart = cache.load(path)
+    assert cache.misses == 2
+    assert len(chart["times"]) == 60
+
+
+def test_invalidate_on_mtime_change(cache, tmp_path):
+    path = writeChart(tmp_path / "a.txt", 50)
+    cache.load(path)
+    # Тот же размер, другие данные и время изменения
+    writeChart(path, 50, shift=5)
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+    chart = cache.load(path)
+    assert cache.misses == 2
+    assert chart["coords"][0, 0] == 5
+
+
+def test_lru_eviction(cache, tmp_path):
+    paths = {name: writeChart(tmp_path / f"{name}.txt", 200) for name in "abc"}
+    for path in paths.values():
+        cache.load(path)
+    entrySize = cache.size() // 3
+    # Время использования записи - время изменения её заголовка
+    for used, name in enumerate("bca", start=1):
+        os.utime(headFile(cache, paths[name]), (used, used))
+
+    cache.maxSize = 2 * entrySize + entrySize // 2
+    cache.evict()
+    assert not os.path.exists(headFile(cache, paths["b"]))
+    assert os.path.exists(headFile(cache, paths["c"]))
+    assert os.path.exists(headFile(cache, paths["a"]))
+    # Попадание отмечает запись как использованную
+    cache.load(paths["c"])
+    assert os.stat(headFile(cache, paths["c"])).st_mtime > 1000
+
+
+def headFile(cache, path):
+    return cache._ChartCache__paths(path)[0]
+
+
+def test_concurrent_writers(cache, tmp_path):
+    path = writeChart(tmp_path / "a.txt", 2000)
+    errors = []
+
+    def load():
+        try:
+            ChartCache(cache.cacheDir).load(path)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=load) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert not errors
+    assert len(cache.load(path)["times"]) == 2000
+    assert not [f for f in os.listdir(cache.cacheDir) if f.endswith(".tmp")]
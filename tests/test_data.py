@@ -0,0 +1,45 @@
+import warnings
+import numpy as np
+import pytest
+from flyplot.data import parseCoords
+
+
+def test_parse_coords():
+    times, coords = parseCoords(b"1 -> 1 2 3\nComment\n2 -> 4 5 6\n")
+    assert times.tolist() == [1, 2]
+    assert coords.tolist() == [[1, 2, 3], [4, 5, 6]]
+
+
+def test_parse_coords_bad_line():
+    # Неверная строка на границе 4 значений не должна обрезать точки
+    text = b"1 -> 1 2 3\n# hi\n2 -> 4 5 6\n3 -> 7 8 9\n4 -> 1 1 1\n"
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", DeprecationWarning)
+        with pytest.raises(ValueError):
+            parseCoords(text)
+
+
+@pytest.mark.parametrize("text", [
+    # Общее число значений сходится, а строки сдвинуты
+    b"1 -> 1 2\n2 -> 3 4 5 6\n",
+    b"1 -> 1 2 3 4\n2 -> 5 6\n",
+    # Две стрелки в одной строке и ни одной в другой
+    b"1 -> 1 2 -> 3\n2 4 5 6\n",
+])
+def test_parse_coords_misaligned(text):
+    with pytest.raises(ValueError):
+        parseCoords(text)
+
+
+def test_parse_coords_line_formats():
+    # Стрелка без пробелов, отрицательные числа и переводы строк Windows
+    times, coords = parseCoords(b"1->-1 2e-1 3\r\n\r\n  \n2 -> 4 -5 6\r\n")
+    assert times.tolist() == [1, 2]
+    assert coords.tolist() == [[-1, 0.2, 3], [4, -5, 6]]
+
+
+def test_parse_coords_empty():
+    times, coords = parseCoords(b"\n\n")
+    assert times.shape == (0,)
+    assert coords.shape == (0, 3)
+    assert np.issubdtype(times.dtype, np.floating)
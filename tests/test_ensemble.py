@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+from flyplot.data import Trajectory
+from flyplot.ensemble import ensembleStats, commonTimeGrid, resample
+
+AXIS = {ax: {"name": ax, "dim": "m"} for ax in "xyz"}
+
+
+def makeRun(scale: float, count: int = 100):
+    t = np.linspace(0, 10, count)
+    return Trajectory("run", AXIS, t, np.c_[t, scale * t, -t])
+
+
+def test_resample_linear():
+    times = np.array([0.0, 1.0, 3.0])
+    coords = np.array([[0, 0, 0], [1, 2, 3], [3, 6, 9]], dtype=np.float64)
+    out = resample(times, coords, np.array([-1.0, 0.5, 2.0, 5.0]))
+    assert out.tolist() == [[0, 0, 0], [0.5, 1, 1.5], [2, 4, 6], [3, 6, 9]]
+
+
+def test_stats_mean_and_bounds():
+    runs = [makeRun(s) for s in (1.0, 2.0, 3.0)]
+    stats = ensembleStats(runs, maxBytes=1024)
+    assert stats.count == 3
+    assert np.allclose(stats.mean[:, 1], 2 * stats.times, atol=1e-4)
+    assert (stats.low <= stats.mean + 1e-5).all()
+    assert (stats.mean <= stats.high + 1e-5).all()
+
+
+def test_stats_skip_empty_runs():
+    empty = {"name": "empty", "axis": AXIS,
+             "times": np.empty(0), "coords": np.empty((0, 3))}
+    runs = [makeRun(1.0), empty, makeRun(3.0)]
+    stats = ensembleStats(runs)
+    assert stats.count == 2
+    assert len(commonTimeGrid(runs)) == 100
+    assert np.allclose(stats.mean[:, 1], 2 * stats.times, atol=1e-4)
+
+
+def test_stats_only_empty_runs():
+    with pytest.raises(ValueError):
+        ensembleStats([Trajectory("empty", AXIS)])
@@ -0,0 +1,185 @@
+import itertools
+import numpy as np
+import pytest
+from flyplot.layout import (gridBounds, tickTexts,
+                            valueTransforms, labelTransforms)
+
+QtGui = pytest.importorskip("PySide6.QtGui")
+
+# Все 8 вариантов направлений осей x, y, z
+OCTANTS = list(itertools.product((1, -1), repeat=3))
+
+
+class RefLabel:
+    """
+    Надпись со старой схемой размещения: каждая операция
+    умножает QMatrix4x4, как это делали TextBase и Transform3D
+    """
+
+    def __init__(self, height, width):
+        self.height = height
+        self.width = width
+        self.tr = QtGui.QMatrix4x4()
+        self.__translate(-height/2, -width/2, 0)
+        self.myRotate(-90, "z")
+
+    def __translate(self, dx, dy, dz):
+        m = QtGui.QMatrix4x4()
+        m.translate(dx, dy, dz)
+        self.tr = self.tr * m
+
+    def myTranslate(self, dx, dy, dz):
+        self.__translate(-dy, dx, dz)
+
+    def myRotate(self, angle, axi):
+        r = {"x": 0, "y": 0, "z": 0}
+        r[axi] = 1
+        r["x"], r["y"] = r["y"], r["x"]
+        self.myTranslate(self.width/2, -self.height/2, 0)
+        m = QtGui.QMatrix4x4()
+        m.rotate(angle, r["x"], r["y"], r["z"])
+        self.tr = self.tr * m
+        self.myTranslate(-self.width/2, self.height/2, 0)
+
+    def matrix(self):
+        return np.array(self.tr.copyDataTo()).reshape(4, 4)
+
+
+def makeAxis(octant):
+    # Точки лежат по ту сторону от 0, куда указывает направление оси
+    axis = {}
+    for ax, d, (lo, hi) in zip("xyz", octant,
+                               ((120, 870), (40, 1330), (250, 480))):
+        if d < 0:
+            lo, hi = -hi, -lo
+        axi = axis[ax] = {"space": 100}
+        axi.update(gridBounds(lo, hi, axi["space"]))
+        axi["value"] = {"offset": 40}
+        axi["label"] = {"offset": 200, "step": 100}
+    return axis
+
+
+def edge(axi, isMax):
+    if (axi["direction"] < 0) == isMax:
+        return axi["min"]
+    return axi["max"]
+
+
+def refValues(axis, ax, heights, widths):
+    x, y, z = axis["x"], axis["y"], axis["z"]
+    xd, yd, zd = x["direction"], y["direction"], z["direction"]
+    labels = [RefLabel(h, w) for h, w in zip(heights, widths)]
+    if ax == "x":
+        point = (x["min"], edge(y, True), edge(z, False))
+        rotations = ((90 * xd, "z"), (180 if zd < 0 else 0, "x"))
+        sign, stepSign = xd * yd, -xd * zd
+    elif ax == "y":
+        point = (edge(x, True), y["min"], edge(z, False))
+        rotations = ((180 if yd > 0 else 0, "z"), (180 if zd < 0 else 0, "x"))
+        sign, stepSign = -xd * yd, -yd * zd
+    else:
+        point = (edge(x, True), edge(y, False), z["min"])
+        rotations = ((180 if yd > 0 else 0, "z"), (90, "x"))
+        sign, stepSign = -xd * yd, 1
+    for v in labels:
+        v.myTranslate(*point)
+        for angle, axi in rotations:
+            v.myRotate(angle, axi)
+        v.myTranslate(sign * (axis[ax]["value"]["offset"] + v.width/2), 0, 0)
+    ddY = 0
+    for v in labels[1:]:
+        ddY += axis[ax]["space"]
+        v.myTranslate(0, stepSign * ddY, 0)
+    # Крайняя метка y и z отодвигается от плоскости
+    if ax == "y":
+        labels[0 if yd > 0 else -1].myTranslate(0, -zd * labels[-1].height/2, 0)
+    elif ax == "z":
+        labels[0 if zd > 0 else -1].myTranslate(0, zd * labels[-1].height/2, 0)
+    return np.array([v.matrix() for v in labels])
+
+
+def refLabels(axis, ax, heights, widths):
+    x, y, z = axis["x"], axis["y"], axis["z"]
+    xd, yd, zd = x["direction"], y["direction"], z["direction"]
+    label = axis[ax]["label"]
+    labels = [RefLabel(h, w) for h, w in zip(heights, widths)]
+    if ax == "x":
+        point = (x["delta"], edge(y, True), edge(z, False))
+        rotations = ((180 if yd > 0 else 0, "z"), (180 if zd < 0 else 0, "x"))
+    elif ax == "y":
+        point = (edge(x, True), y["delta"], edge(z, False))
+        rotations = ((90 * xd, "z"), (180 if zd < 0 else 0, "x"))
+    else:
+        point = (edge(x, True), edge(y, False), z["delta"])
+        rotations = ((180 if yd > 0 else 0, "z"), (90, "x"),
+                     (-90 * xd * zd * yd, "z"))
+    for l in labels:
+        l.myTranslate(*point)
+        for angle, axi in rotations:
+            l.myRotate(angle, axi)
+        l.myTranslate(0, -zd * l.height/2, 0)
+    ddY = label["offset"]
+    for l in labels:
+        ddY += l.height/2
+        if ax != "x":
+            ddY += label["step"]
+        l.myTranslate(0, -zd * ddY, 0)
+        ddY += label["step"]
+    return np.array([l.matrix() for l in labels])
+
+
+def test_grid_bounds_positive():
+    b = gridBounds(120, 870, 100)
+    assert (b["min"], b["max"], b["size"], b["delta"]) == (0, 900, 900, 450)
+    assert (b["amin"], b["amax"], b["direction"]) == (0, 900, 1)
+
+
+def test_grid_bounds_negative():
+    b = gridBounds(-870, -120, 100)
+    assert (b["min"], b["max"], b["size"], b["delta"]) == (-900, 0, 900, -450)
+    assert (b["amin"], b["amax"], b["direction"]) == (0, -900, -1)
+
+
+def test_grid_bounds_through_zero():
+    # Сетка через 0: ближний край тот, что меньше по модулю
+    b = gridBounds(-150, 420, 100)
+    assert (b["min"], b["max"], b["size"]) == (-200, 500, 700)
+    assert (b["amin"], b["amax"], b["direction"]) == (-200, 500, 1)
+
+
+def test_tick_texts():
+    assert tickTexts(-300, 500, 100) == ["-300", "-200", "-100", "0",
+                                         "100", "200"]
+    assert tickTexts(0, 1, 0.25) == ["0.0", "0.25", "0.5", "0.75", "1.0"]
+
+
+@pytest.mark.parametrize("octant", OCTANTS)
+@pytest.mark.parametrize("ax", "xyz")
+def test_value_transforms(octant, ax):
+    axis = makeAxis(octant)
+    assert tuple(axis[a]["direction"] for a in "xyz") == octant
+    n = len(tickTexts(axis[ax]["min"], axis[ax]["size"], axis[ax]["space"]))
+    heights = np.full(n, 60.0)
+    widths = 30.0 * np.arange(1, n + 1)
+    mats = valueTransforms(axis, ax, heights, widths)
+    assert mats.shape == (n, 4, 4)
+    np.testing.assert_allclose(mats, refValues(axis, ax, heights, widths),
+                               rtol=1e-5, atol=1e-3)
+
+
+@pytest.mark.parametrize("octant", OCTANTS)
+@pytest.mark.parametrize("ax", "xyz")
+def test_label_transforms(octant, ax):
+    axis = makeAxis(octant)
+    heights = np.array([200.0, 120.0])
+    widths = np.array([700.0, 300.0])
+    mats = labelTransforms(axis, ax, heights, widths)
+    assert mats.shape == (2, 4, 4)
+    np.testing.assert_allclose(mats, refLabels(axis, ax, heights, widths),
+                               rtol=1e-5, atol=1e-3)
+
+
+def test_empty_transforms():
+    axis = makeAxis((1, 1, 1))
+    assert valueTransforms(axis, "x", [], []).shape == (0, 4, 4)
+    assert labelTransforms(axis, "z", [], []).shape == (0, 4, 4)
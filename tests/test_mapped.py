@@ -0,0 +1,80 @@
+import numpy as np
+import pytest
+from flyplot.data import loadChart
+from flyplot.mapped import MappedTrajectory
+from flyplot.lod import StreamDecimator, decimate
+
+
+def writeChart(path, count: int):
+    t = np.arange(1, count + 1) * 0.01
+    coords = np.c_[np.sin(t), np.cos(t), 1000 * np.sin(t / 7) ** 2]
+    with open(path, "w") as f:
+        f.write("name: Test\ntype: 3D\nx: North | m\ny: East | m\nz: Altitude | m\ncoords:\n")
+        for ti, (x, y, z) in zip(t, coords):
+            f.write(f"{ti:.6f} -> {x:.6f} {y:.6f} {z:.6f}\n")
+    return t, coords
+
+
+@pytest.fixture(scope="module")
+def chartFile(tmp_path_factory):
+    path = tmp_path_factory.mktemp("mapped") / "big.txt"
+    writeChart(path, 50_000)
+    return path
+
+
+@pytest.mark.parametrize("overviewPoints", [20, 100, 1000])
+def test_overview_bounded(chartFile, overviewPoints):
+    # Файл намного больше части индекса: хвосты частей не должны копиться
+    mapped = MappedTrajectory(str(chartFile), step=64, overviewPoints=overviewPoints)
+    try:
+        assert len(mapped) == 50_000
+        assert 2 <= len(mapped.overview) <= 2 * overviewPoints
+        assert mapped.overview.times[0] == mapped.times[0]
+        assert mapped.overview.times[-1] == pytest.approx(500.0)
+    finally:
+        mapped.close()
+
+
+@pytest.fixture(scope="module")
+def smallChartFile(tmp_path_factory):
+    path = tmp_path_factory.mktemp("mapped") / "small.txt"
+    writeChart(path, 5_000)
+    return path
+
+
+@pytest.mark.parametrize("t0, t1", [
+    (0, 100),               # весь файл
+    (0.38, 0.38),           # ровно на первой точке второй части
+    (1.23, 4.56),           # через несколько частей
+    (1.245, 1.255),         # внутри одной части
+    (9.995, 10.5),          # края в середине частей
+    (49.9, 60),             # хвост файла
+    (60, 70),               # правее всех точек
+])
+def test_window_matches_load_chart(smallChartFile, t0, t1):
+    # Маленькие step и blockSize: окно пересекает границы частей и блоков
+    chart = loadChart(str(smallChartFile))
+    i = np.searchsorted(chart["times"], t0, "left")
+    j = np.searchsorted(chart["times"], t1, "right")
+    mapped = MappedTrajectory(str(smallChartFile), step=37)
+    try:
+        win = mapped.window(t0, t1, dtype=np.float64, blockSize=1000)
+        np.testing.assert_array_equal(win.times, chart["times"][i:j])
+        np.testing.assert_array_equal(win.coords, chart["coords"][i:j])
+    finally:
+        mapped.close()
+
+
+def test_stream_decimator_matches_decimate():
+    coords = np.random.default_rng(0).standard_normal((10_007, 3))
+    times = np.arange(len(coords), dtype=np.float64)
+    decimator = StreamDecimator(16)
+    parts = [decimator.push(times[a:a + 1000], coords[a:a + 1000])
+             for a in range(0, len(times), 1000)]
+    parts.append(decimator.finish())
+    kept = np.concatenate([p[0] for p in parts]).astype(int)
+    # Целые корзины прореживаются так же, как за один раз
+    full = len(times) // 16 * 16
+    expected = decimate(coords, 16)
+    assert kept[kept < full].tolist() == expected[expected < full].tolist()
+    assert kept[-1] == len(times) - 1